@@ -6,7 +6,6 @@ Run this to start the MCP server locally
 
 import os
 import sys
-import asyncio
 from pathlib import Path
 
 # Add src to Python path
@@ -31,8 +30,8 @@ def main():
     print("   Press Ctrl+C to stop\n")
     
     try:
-        from src.server import main as server_main
-        asyncio.run(server_main())
+        from src.server import run as run_server
+        run_server()
     except KeyboardInterrupt:
         print("\n\n✅ Server stopped")
     except Exception as e:
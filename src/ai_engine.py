@@ -1,13 +1,14 @@
 """AI Engine for intelligent marketing decision-making using OpenAI's API"""
 
 import os
-import json
+import orjson
 import asyncio
 from typing import Dict, Any, List, Optional, Tuple, Union
 from datetime import datetime, timedelta
 from enum import Enum
 import logging
 from dataclasses import dataclass, asdict
+from functools import lru_cache
 from jinja2 import Template
 
 import openai
@@ -88,10 +89,15 @@ class MarketingAIEngine:
         
         self.client = AsyncOpenAI(api_key=self.api_key)
         self.model = model
-        self.prompt_templates = self._initialize_prompt_templates()
+        # Copy the shared defaults so per-engine additions don't leak across instances
+        self.prompt_templates = dict(self._initialize_prompt_templates())
+        # Cap concurrent OpenAI requests so parallel chain steps stay within rate limits
+        self._request_semaphore = asyncio.Semaphore(int(os.getenv("OPENAI_MAX_CONCURRENT_REQUESTS", "10")))
         
-    def _initialize_prompt_templates(self) -> Dict[str, PromptTemplate]:
-        """Initialize prompt templates for different marketing tasks"""
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def _initialize_prompt_templates() -> Dict[str, PromptTemplate]:
+        """Initialize prompt templates for different marketing tasks (built once per process)"""
         templates = {
             "campaign_analysis": PromptTemplate(
                 name="campaign_analysis",
@@ -229,6 +235,11 @@ Please provide:
             raise ValueError(f"Template '{template_name}' not found")
         return self.prompt_templates[template_name]
     
+    async def _create_completion(self, **kwargs):
+        """Create a chat completion, limited by the engine's request semaphore"""
+        async with self._request_semaphore:
+            return await self.client.chat.completions.create(**kwargs)
+    
     def render_prompt(self, template_name: str, **kwargs) -> str:
         """Render a prompt template with provided variables"""
         prompt_template = self.get_prompt_template(template_name)
@@ -239,9 +250,15 @@ Please provide:
             raise ValueError(f"Missing required variables: {missing_vars}")
         
         # Render template
-        template = Template(prompt_template.template)
+        template = self._compile_template(prompt_template.template)
         return template.render(**kwargs)
     
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _compile_template(source: str) -> Template:
+        """Compile a prompt template's Jinja source once and reuse it for every render"""
+        return Template(source)
+    
     async def analyze_campaign_performance(
         self,
         campaigns: List[Dict[str, Any]],
@@ -326,7 +343,7 @@ Please provide:
         }]
         
         try:
-            response = await self.client.chat.completions.create(
+            response = await self._create_completion(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": "You are a marketing analytics expert."},
@@ -337,7 +354,7 @@ Please provide:
             )
             
             # Parse function call response
-            function_args = json.loads(response.choices[0].message.function_call.arguments)
+            function_args = orjson.loads(response.choices[0].message.function_call.arguments)
             
             # Convert to CampaignPerformance objects
             performances = []
@@ -420,7 +437,7 @@ Please provide:
         }]
         
         try:
-            response = await self.client.chat.completions.create(
+            response = await self._create_completion(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": "You are a marketing optimization expert specializing in budget allocation and campaign performance."},
@@ -430,7 +447,7 @@ Please provide:
                 function_call={"name": "generate_suggestions"}
             )
             
-            function_args = json.loads(response.choices[0].message.function_call.arguments)
+            function_args = orjson.loads(response.choices[0].message.function_call.arguments)
             
             # Convert to OptimizationSuggestion objects
             suggestions = []
@@ -518,7 +535,7 @@ Please provide:
         }]
         
         try:
-            response = await self.client.chat.completions.create(
+            response = await self._create_completion(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": "You are an expert copywriter specializing in digital advertising."},
@@ -528,7 +545,7 @@ Please provide:
                 function_call={"name": "generate_ad_copy"}
             )
             
-            function_args = json.loads(response.choices[0].message.function_call.arguments)
+            function_args = orjson.loads(response.choices[0].message.function_call.arguments)
             
             # Convert to AdCopyVariant objects
             variants = []
@@ -560,58 +577,114 @@ Please provide:
         results = {"chain_name": chain_name, "steps": []}
         context = initial_data.copy()
         
-        for i, step in enumerate(steps):
-            step_name = step.get("name", f"step_{i}")
-            template_name = step["template"]
-            
-            # Prepare variables for this step, including results from previous steps
-            variables = step.get("variables", {})
-            for key, value in variables.items():
-                # Support referencing previous step results
-                if isinstance(value, str) and value.startswith("$"):
-                    path = value[1:].split(".")
-                    if path[0] == "context":
-                        variables[key] = self._get_nested_value(context, path[1:])
-                    elif path[0] == "results":
-                        variables[key] = self._get_nested_value(results, path[1:])
-            
-            # Merge with context
-            step_vars = {**context, **variables}
-            
-            # Execute step based on template type
-            if template_name == "campaign_analysis":
-                result = await self.analyze_campaign_performance(
-                    campaigns=step_vars.get("campaigns", []),
-                    start_date=step_vars.get("start_date"),
-                    end_date=step_vars.get("end_date"),
-                    benchmarks=step_vars.get("benchmarks")
-                )
-            elif template_name == "budget_optimization":
-                result = await self.generate_optimization_suggestions(
-                    campaigns=step_vars.get("campaigns", []),
-                    total_budget=step_vars.get("total_budget"),
-                    optimization_goal=step_vars.get("optimization_goal", "maximize_roi")
-                )
-            else:
-                # Generic prompt execution
-                prompt = self.render_prompt(template_name, **step_vars)
-                result = await self._execute_generic_prompt(prompt, step.get("output_format"))
+        # Run each wave of mutually independent steps concurrently, in order
+        for wave in self._chain_waves(steps):
+            tasks = [
+                asyncio.ensure_future(self._execute_chain_step(i, step, context, results))
+                for i, step in wave
+            ]
+            try:
+                step_results = await asyncio.gather(*tasks)
+            except BaseException:
+                # One failed step fails the chain, so stop the rest of its wave too
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
             
-            # Store step result
-            step_result = {
-                "step_name": step_name,
-                "template": template_name,
-                "result": result if not isinstance(result, list) else [asdict(r) if hasattr(r, '__dataclass_fields__') else r for r in result]
-            }
-            results["steps"].append(step_result)
-            
-            # Update context with step results if specified
-            if step.get("update_context"):
-                context[step_name] = step_result["result"]
+            for (_, step), step_result in zip(wave, step_results):
+                # Store step result
+                results["steps"].append(step_result)
+                
+                # Update context with step results if specified
+                if step.get("update_context"):
+                    context[step_result["step_name"]] = step_result["result"]
         
         results["final_context"] = context
         return results
     
+    @staticmethod
+    def _chain_waves(steps: List[Dict[str, Any]]) -> List[List[Tuple[int, Dict[str, Any]]]]:
+        """Group consecutive chain steps that don't reference each other's results"""
+        waves = []
+        wave = []
+        wave_names = set()
+        for i, step in enumerate(steps):
+            references = [
+                value[1:].split(".")
+                for value in step.get("variables", {}).values()
+                if isinstance(value, str) and value.startswith("$")
+            ]
+            # A "$results" reference or a "$context" reference to a step in this wave needs it finished
+            depends_on_wave = any(
+                path[0] == "results" or (path[0] == "context" and len(path) > 1 and path[1] in wave_names)
+                for path in references
+            )
+            if wave and depends_on_wave:
+                waves.append(wave)
+                wave = []
+                wave_names = set()
+            wave.append((i, step))
+            wave_names.add(step.get("name", f"step_{i}"))
+            # Later steps merge the whole context, so one that updates it ends the wave
+            if step.get("update_context"):
+                waves.append(wave)
+                wave = []
+                wave_names = set()
+        if wave:
+            waves.append(wave)
+        return waves
+    
+    async def _execute_chain_step(
+        self,
+        index: int,
+        step: Dict[str, Any],
+        context: Dict[str, Any],
+        results: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Execute a single prompt chain step against the results gathered so far"""
+        step_name = step.get("name", f"step_{index}")
+        template_name = step["template"]
+        
+        # Prepare variables for this step, including results from previous steps
+        variables = dict(step.get("variables", {}))
+        for key, value in variables.items():
+            # Support referencing previous step results
+            if isinstance(value, str) and value.startswith("$"):
+                path = value[1:].split(".")
+                if path[0] == "context":
+                    variables[key] = self._get_nested_value(context, path[1:])
+                elif path[0] == "results":
+                    variables[key] = self._get_nested_value(results, path[1:])
+        
+        # Merge with context
+        step_vars = {**context, **variables}
+        
+        # Execute step based on template type
+        if template_name == "campaign_analysis":
+            result = await self.analyze_campaign_performance(
+                campaigns=step_vars.get("campaigns", []),
+                start_date=step_vars.get("start_date"),
+                end_date=step_vars.get("end_date"),
+                benchmarks=step_vars.get("benchmarks")
+            )
+        elif template_name == "budget_optimization":
+            result = await self.generate_optimization_suggestions(
+                campaigns=step_vars.get("campaigns", []),
+                total_budget=step_vars.get("total_budget"),
+                optimization_goal=step_vars.get("optimization_goal", "maximize_roi")
+            )
+        else:
+            # Generic prompt execution
+            prompt = self.render_prompt(template_name, **step_vars)
+            result = await self._execute_generic_prompt(prompt, step.get("output_format"))
+        
+        return {
+            "step_name": step_name,
+            "template": template_name,
+            "result": result if not isinstance(result, list) else [asdict(r) if hasattr(r, '__dataclass_fields__') else r for r in result]
+        }
+    
     def _get_nested_value(self, data: Dict[str, Any], path: List[str]) -> Any:
         """Get nested value from dictionary using path"""
         value = data
@@ -640,17 +713,17 @@ Please provide:
                 "parameters": output_format
             }]
             
-            response = await self.client.chat.completions.create(
+            response = await self._create_completion(
                 model=self.model,
                 messages=messages,
                 functions=functions,
                 function_call={"name": "respond"}
             )
             
-            return json.loads(response.choices[0].message.function_call.arguments)
+            return orjson.loads(response.choices[0].message.function_call.arguments)
         else:
             # Regular completion
-            response = await self.client.chat.completions.create(
+            response = await self._create_completion(
                 model=self.model,
                 messages=messages
             )
@@ -491,9 +491,8 @@ def server(ctx, command):
     try:
         if command == 'start':
             click.echo("🚀 Starting MCP server...")
-            from src.server import MarketingAutomationServer
-            server = MarketingAutomationServer()
-            asyncio.run(server.run())
+            from src.server import run as run_server
+            run_server()
             
         elif command == 'stop':
             click.echo("🛑 Stopping MCP server...")
@@ -1,22 +1,31 @@
 """Database models and utilities for marketing automation tracking"""
 
 import os
+import time
+import atexit
+import weakref
 from datetime import datetime, timedelta
 from typing import Optional, List, Dict, Any, Tuple
 from decimal import Decimal
+from statistics import fmean
 import json
 from enum import Enum
 from contextlib import contextmanager
+from uuid import uuid4
+import logging
 
 from sqlalchemy import (
     create_engine, Column, Integer, String, Float, DateTime, Boolean,
-    Text, JSON, ForeignKey, Enum as SQLEnum, Numeric, Index, func
+    Text, JSON, ForeignKey, Enum as SQLEnum, Numeric, Index, func, insert,
+    update, bindparam, select, event
 )
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship, sessionmaker, Session
 from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.sql import case
 
+logger = logging.getLogger(__name__)
+
 Base = declarative_base()
 
 
@@ -242,20 +251,42 @@ class PerformanceMetrics(Base):
             return ((self.conversion_rate - self.baseline_conversion_rate) / self.baseline_conversion_rate) * 100
         return 0
     
-    def calculate_metrics(self):
-        """Calculate derived metrics"""
-        if self.impressions > 0:
-            self.ctr = (self.clicks / self.impressions) * 100
+    @staticmethod
+    def derived_metrics(
+        impressions: int,
+        clicks: int,
+        conversions: int,
+        cost: Any,
+        revenue: Any
+    ) -> Dict[str, Any]:
+        """Calculate the derived metrics that apply to the given raw counts"""
+        # Do the ratio math in float; money columns are converted back to Decimal on assignment
+        cost = float(cost or 0)
+        revenue = float(revenue or 0)
+        derived = {}
+        
+        if impressions > 0:
+            derived['ctr'] = (clicks / impressions) * 100
+        
+        if clicks > 0:
+            derived['conversion_rate'] = (conversions / clicks) * 100
+            derived['cpc'] = Decimal(str(round(cost / clicks, 4)))
         
-        if self.clicks > 0:
-            self.conversion_rate = (self.conversions / self.clicks) * 100
-            self.cpc = self.cost / self.clicks
+        if conversions > 0:
+            derived['cpa'] = Decimal(str(round(cost / conversions, 4)))
         
-        if self.conversions > 0:
-            self.cpa = self.cost / self.conversions
+        if cost > 0:
+            derived['roas'] = revenue / cost
         
-        if self.cost > 0:
-            self.roas = float(self.revenue) / float(self.cost)
+        return derived
+    
+    def calculate_metrics(self):
+        """Calculate derived metrics"""
+        derived = self.derived_metrics(
+            self.impressions or 0, self.clicks or 0, self.conversions or 0, self.cost, self.revenue
+        )
+        for name, value in derived.items():
+            setattr(self, name, value)
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert metrics to dictionary"""
@@ -353,6 +384,16 @@ class ROITracking(Base):
         }
 
 
+def _success_score(expected_impact: Dict[str, float], actual_impact: Dict[str, float]) -> float:
+    """Average percentage of expected impact met across shared metrics, capped at 200% each"""
+    scores = [
+        min((actual_impact[metric] / expected) * 100, 200)
+        for metric, expected in expected_impact.items()
+        if expected != 0 and metric in actual_impact
+    ]
+    return fmean(scores) if scores else 0
+
+
 class AIDecisionHistory(Base):
     """Track AI decisions and their outcomes"""
     __tablename__ = 'ai_decision_history'
@@ -390,18 +431,7 @@ class AIDecisionHistory(Base):
         if not self.expected_impact or not self.actual_impact:
             return None
         
-        scores = []
-        for metric, expected in self.expected_impact.items():
-            if metric in self.actual_impact and expected != 0:
-                actual = self.actual_impact[metric]
-                # Calculate percentage of expectation met
-                score = min((actual / expected) * 100, 200)  # Cap at 200%
-                scores.append(score)
-        
-        if scores:
-            self.success_score = sum(scores) / len(scores)
-        else:
-            self.success_score = 0
+        self.success_score = _success_score(self.expected_impact, self.actual_impact)
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert AI decision to dictionary"""
@@ -425,19 +455,73 @@ class AIDecisionHistory(Base):
         }
 
 
+# Live managers whose cached ROI aggregates are cleared when task or metric writes commit
+_roi_cache_owners: 'weakref.WeakSet[DatabaseManager]' = weakref.WeakSet()
+_ROI_INPUT_TABLES = (AutomationTask.__table__, PerformanceMetrics.__table__)
+
+
+@event.listens_for(Session, 'after_flush')
+def _flag_roi_inputs_flushed(session: Session, flush_context) -> None:
+    """Mark sessions that flushed tasks or metrics so their commit clears cached ROI aggregates"""
+    if any(
+        isinstance(obj, (AutomationTask, PerformanceMetrics))
+        for obj in (*session.new, *session.dirty, *session.deleted)
+    ):
+        session.info['roi_inputs_changed'] = True
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _flag_roi_inputs_executed(orm_execute_state) -> None:
+    """Mark sessions that ran bulk INSERT/UPDATE/DELETE statements against tasks or metrics"""
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, 'table', None)
+        if any(table is roi_table for roi_table in _ROI_INPUT_TABLES):
+            orm_execute_state.session.info['roi_inputs_changed'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_roi_caches(session: Session) -> None:
+    """Clear cached ROI aggregates once writes to their inputs are committed, whichever session made them"""
+    if session.info.pop('roi_inputs_changed', False):
+        for manager in list(_roi_cache_owners):
+            manager.invalidate_roi_cache()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_roi_inputs_flag(session: Session) -> None:
+    """Rolled-back writes never reach the database, so they leave the caches alone"""
+    session.info.pop('roi_inputs_changed', None)
+
+
 # Database utilities
 class DatabaseManager:
     """Manage database connections and operations"""
     
-    def __init__(self, database_url: Optional[str] = None):
+    def __init__(self, database_url: Optional[str] = None, **engine_options: Any):
         if not database_url:
             database_url = os.getenv('DATABASE_URL', 'sqlite:///marketing_automation.db')
         
-        self.engine = create_engine(database_url, echo=False)
-        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.engine = create_engine(database_url, echo=False, **engine_options)
+        # Keep loaded attributes after commit so returned records stay readable once their session closes
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=self.engine)
         
         # Create tables
         Base.metadata.create_all(bind=self.engine)
+        
+        # Recent period ROI aggregates, cleared whenever a session in this process commits task or
+        # metric writes. Writes from other processes (CLI, dashboard, other workers) are not seen,
+        # so results can be stale across processes for up to roi_cache_ttl seconds.
+        self.roi_cache_ttl = float(os.getenv('ROI_CACHE_TTL', '300'))
+        self._roi_cache: Dict[Tuple[datetime, datetime, Optional[int]], Tuple[float, Dict[str, Any]]] = {}
+        _roi_cache_owners.add(self)
+        
+        # AI decision outcomes waiting to be written in one batch
+        self.outcome_batch_size = int(os.getenv('OUTCOME_BATCH_SIZE', '100'))
+        self._pending_outcomes: List[Tuple[str, Dict[str, Any]]] = []
+    
+    def invalidate_roi_cache(self):
+        """Drop cached period ROI aggregates after the underlying data changes"""
+        self._roi_cache.clear()
     
     @contextmanager
     def get_session(self):
@@ -531,80 +615,139 @@ class DatabaseManager:
             session.flush()
             return perf_metrics
     
+    def record_performance_metrics_bulk(
+        self,
+        campaign_id: int,
+        metrics_rows: List[Dict[str, Any]],
+        is_automated: bool = False,
+        automation_applied: Optional[List[str]] = None
+    ) -> int:
+        """Record several performance metrics rows for a campaign with one executemany insert
+        
+        All rows must provide the same metric keys. Returns the number of rows inserted.
+        """
+        recorded_at = datetime.utcnow()
+        rows = []
+        for metrics in metrics_rows:
+            derived = PerformanceMetrics.derived_metrics(
+                metrics.get('impressions') or 0,
+                metrics.get('clicks') or 0,
+                metrics.get('conversions') or 0,
+                metrics.get('cost'),
+                metrics.get('revenue')
+            )
+            rows.append({
+                # Column defaults for derived metrics that don't apply keep every row's keys identical
+                'ctr': 0,
+                'conversion_rate': 0,
+                'cpc': Decimal('0'),
+                'cpa': Decimal('0'),
+                'roas': 0,
+                **metrics,
+                **derived,
+                'metric_id': f"metric_{uuid4().hex}",
+                'campaign_id': campaign_id,
+                'metric_date': recorded_at,
+                'is_automated': is_automated,
+                'automation_applied': automation_applied
+            })
+        
+        if rows:
+            # Core INSERT on the session's connection: one executemany, no per-row ORM bookkeeping
+            with self.get_session() as session:
+                session.execute(insert(PerformanceMetrics.__table__), rows)
+        return len(rows)
+    
     def calculate_period_roi(
         self,
         period_start: datetime,
         period_end: datetime,
         campaign_id: Optional[int] = None
     ) -> ROITracking:
-        """Calculate ROI for a time period"""
+        """Calculate ROI for a time period and record it, reusing recent aggregates for the same period"""
         with self.get_session() as session:
-            # Query automation tasks in period
-            task_query = session.query(AutomationTask).filter(
-                AutomationTask.completed_at >= period_start,
-                AutomationTask.completed_at <= period_end,
-                AutomationTask.status == TaskStatus.COMPLETED
-            )
-            
-            if campaign_id:
-                task_query = task_query.filter_by(campaign_id=campaign_id)
-            
-            tasks = task_query.all()
-            
-            # Calculate aggregate metrics
-            total_time_saved_hours = sum(task.time_saved_minutes for task in tasks) / 60
-            labor_cost_saved = sum(task.cost_saved for task in tasks)
-            tasks_automated = len(tasks)
-            
-            # Query performance improvements
-            perf_query = session.query(PerformanceMetrics).filter(
-                PerformanceMetrics.metric_date >= period_start,
-                PerformanceMetrics.metric_date <= period_end,
-                PerformanceMetrics.is_automated == True
-            )
-            
-            if campaign_id:
-                perf_query = perf_query.filter_by(campaign_id=campaign_id)
-            
-            performances = perf_query.all()
-            
-            # Calculate average improvements
-            ctr_improvements = [p.ctr_improvement for p in performances if p.ctr_improvement]
-            conversion_improvements = [p.conversion_improvement for p in performances if p.conversion_improvement]
-            
-            avg_ctr_improvement = sum(ctr_improvements) / len(ctr_improvements) if ctr_improvements else 0
-            avg_conversion_improvement = sum(conversion_improvements) / len(conversion_improvements) if conversion_improvements else 0
-            
-            # Estimate performance value added (simplified calculation)
-            performance_value_added = Decimal('0')
-            for perf in performances:
-                if perf.baseline_conversion_rate and perf.conversion_rate > perf.baseline_conversion_rate:
-                    additional_conversions = ((perf.conversion_rate - perf.baseline_conversion_rate) / 100) * perf.clicks
-                    # Assume average order value of $100
-                    performance_value_added += Decimal(str(additional_conversions * 100))
+            aggregates = self._period_roi_aggregates(session, period_start, period_end, campaign_id)
             
             # Create ROI tracking record
             roi_tracking = ROITracking(
-                roi_id=f"roi_{datetime.utcnow().timestamp()}",
+                roi_id=f"roi_{uuid4().hex}",
                 campaign_id=campaign_id,
                 tracking_period='custom',
                 period_start=period_start,
                 period_end=period_end,
-                total_time_saved_hours=total_time_saved_hours,
-                tasks_automated=tasks_automated,
-                labor_cost_saved=labor_cost_saved,
-                performance_value_added=performance_value_added,
-                avg_ctr_improvement=avg_ctr_improvement,
-                avg_conversion_improvement=avg_conversion_improvement,
-                automation_cost=Decimal('100')  # Default automation cost
+                automation_cost=Decimal('100'),  # Default automation cost
+                **aggregates
             )
             
             roi_tracking.calculate_roi()
             session.add(roi_tracking)
             session.flush()
-            
             return roi_tracking
     
+    def _period_roi_aggregates(
+        self,
+        session: Session,
+        period_start: datetime,
+        period_end: datetime,
+        campaign_id: Optional[int]
+    ) -> Dict[str, Any]:
+        """Sum automation tasks and automated metrics for a period, cached for roi_cache_ttl seconds"""
+        cache_key = (period_start, period_end, campaign_id)
+        cached = self._roi_cache.get(cache_key)
+        if cached and time.monotonic() - cached[0] < self.roi_cache_ttl:
+            return cached[1]
+        
+        # Query automation tasks in period
+        task_query = session.query(AutomationTask).filter(
+            AutomationTask.completed_at >= period_start,
+            AutomationTask.completed_at <= period_end,
+            AutomationTask.status == TaskStatus.COMPLETED
+        )
+        
+        if campaign_id:
+            task_query = task_query.filter_by(campaign_id=campaign_id)
+        
+        tasks = task_query.all()
+        
+        # Query performance improvements
+        perf_query = session.query(PerformanceMetrics).filter(
+            PerformanceMetrics.metric_date >= period_start,
+            PerformanceMetrics.metric_date <= period_end,
+            PerformanceMetrics.is_automated == True
+        )
+        
+        if campaign_id:
+            perf_query = perf_query.filter_by(campaign_id=campaign_id)
+        
+        performances = perf_query.all()
+        
+        # Calculate average improvements
+        ctr_improvements = [p.ctr_improvement for p in performances if p.ctr_improvement]
+        conversion_improvements = [p.conversion_improvement for p in performances if p.conversion_improvement]
+        
+        # Estimate performance value added (simplified calculation)
+        performance_value_added = Decimal('0')
+        for perf in performances:
+            if perf.baseline_conversion_rate and perf.conversion_rate > perf.baseline_conversion_rate:
+                additional_conversions = ((perf.conversion_rate - perf.baseline_conversion_rate) / 100) * perf.clicks
+                # Assume average order value of $100
+                performance_value_added += Decimal(str(additional_conversions * 100))
+        
+        aggregates = {
+            'total_time_saved_hours': sum(task.time_saved_minutes for task in tasks) / 60,
+            'tasks_automated': len(tasks),
+            'labor_cost_saved': sum(task.cost_saved for task in tasks),
+            'performance_value_added': performance_value_added,
+            'avg_ctr_improvement': fmean(ctr_improvements) if ctr_improvements else 0,
+            'avg_conversion_improvement': fmean(conversion_improvements) if conversion_improvements else 0
+        }
+        
+        # Bound the cache so callers passing ever-changing periods cannot grow it without limit
+        if len(self._roi_cache) >= 256:
+            self._roi_cache.clear()
+        self._roi_cache[cache_key] = (time.monotonic(), aggregates)
+        return aggregates
+    
     def record_ai_decision(
         self,
         decision_type: DecisionType,
@@ -654,6 +797,72 @@ class DatabaseManager:
             decision.calculate_success_score()
             session.flush()
     
+    def queue_ai_decision_outcome(self, decision_id: str, actual_impact: Dict[str, Any]):
+        """Queue an AI decision outcome, writing the queue once it reaches outcome_batch_size
+        
+        Call flush_ai_decision_outcomes() before reading queued outcomes back.
+        """
+        self._pending_outcomes.append((decision_id, actual_impact))
+        if len(self._pending_outcomes) >= self.outcome_batch_size:
+            self.flush_ai_decision_outcomes()
+    
+    def flush_ai_decision_outcomes(self) -> int:
+        """Write all queued AI decision outcomes with one select and one executemany update
+        
+        Returns the number of decisions updated.
+        """
+        if not self._pending_outcomes:
+            return 0
+        
+        # Later outcomes for the same decision replace earlier ones
+        pending_count = len(self._pending_outcomes)
+        outcomes = dict(self._pending_outcomes)
+        
+        table = AIDecisionHistory.__table__
+        measured_at = datetime.utcnow()
+        with self.get_session() as session:
+            expected = dict(session.execute(
+                select(table.c.decision_id, table.c.expected_impact)
+                .where(table.c.decision_id.in_(outcomes))
+            ).all())
+            
+            # Unknown decisions are reported and dropped without holding back the rest of the batch
+            for decision_id in sorted(outcomes.keys() - expected.keys()):
+                logger.warning("Dropping queued outcome for unknown decision %s", decision_id)
+            
+            scored_rows = []
+            unscored_rows = []
+            for decision_id, actual_impact in outcomes.items():
+                if decision_id not in expected:
+                    continue
+                row = {
+                    'b_decision_id': decision_id,
+                    'actual_impact': actual_impact,
+                    'impact_measured_at': measured_at
+                }
+                if expected[decision_id] and actual_impact:
+                    row['success_score'] = _success_score(expected[decision_id], actual_impact)
+                    scored_rows.append(row)
+                else:
+                    # Leave any existing success score alone when there is nothing to score against
+                    unscored_rows.append(row)
+            
+            statement = update(table).where(table.c.decision_id == bindparam('b_decision_id'))
+            for rows in (scored_rows, unscored_rows):
+                if rows:
+                    session.execute(statement, rows)
+        
+        # Only drop the flushed outcomes once they are committed; a failed flush keeps them queued
+        del self._pending_outcomes[:pending_count]
+        return len(scored_rows) + len(unscored_rows)
+    
+    def close(self):
+        """Write any queued AI decision outcomes and release the engine's connections"""
+        try:
+            self.flush_ai_decision_outcomes()
+        finally:
+            self.engine.dispose()
+    
     def get_automation_summary(self, days: int = 30) -> Dict[str, Any]:
         """Get automation summary for the last N days"""
         with self.get_session() as session:
@@ -720,5 +929,6 @@ class DatabaseManager:
             }
 
 
-# Create a global database manager instance
-db = DatabaseManager()
\ No newline at end of file
+# Create a global database manager instance, writing queued outcomes at interpreter exit
+db = DatabaseManager()
+atexit.register(db.close)
\ No newline at end of file
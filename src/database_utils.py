@@ -3,6 +3,7 @@
 from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, timedelta
 from decimal import Decimal
+from statistics import fmean
 import logging
 
 from .database import (
@@ -229,12 +230,12 @@ async def measure_optimization_impact(
         if metrics_after:
             # Average metrics over the period
             actual_impact = {
-                "avg_ctr": sum(m.ctr for m in metrics_after) / len(metrics_after),
-                "avg_conversion_rate": sum(m.conversion_rate for m in metrics_after) / len(metrics_after),
+                "avg_ctr": fmean(m.ctr for m in metrics_after),
+                "avg_conversion_rate": fmean(m.conversion_rate for m in metrics_after),
                 "total_conversions": sum(m.conversions for m in metrics_after),
                 "total_revenue": sum(float(m.revenue) for m in metrics_after),
-                "avg_cpa": sum(float(m.cpa) for m in metrics_after if m.cpa) / len([m for m in metrics_after if m.cpa]),
-                "avg_roas": sum(m.roas for m in metrics_after) / len(metrics_after)
+                "avg_cpa": fmean(float(m.cpa) for m in metrics_after if m.cpa),
+                "avg_roas": fmean(m.roas for m in metrics_after)
             }
         
         # Update decision with actual impact
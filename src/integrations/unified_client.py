@@ -65,26 +65,18 @@ class UnifiedMarketingClient:
     
     async def connect_all(self):
         """Connect to all available platforms"""
-        tasks = []
-        for platform, client in self.clients.items():
-            tasks.append(self._safe_connect(platform, client))
-        
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        # return_exceptions collects each platform's failure, so no per-client wrapper is needed
+        results = await asyncio.gather(
+            *(client.connect() for client in self.clients.values()),
+            return_exceptions=True
+        )
         
         for platform, result in zip(self.clients.keys(), results):
-            if isinstance(result, Exception):
+            if isinstance(result, BaseException):
                 logger.warning(f"Failed to connect to {platform.value}: {result}")
             else:
                 self._connected_clients.add(platform)
     
-    async def _safe_connect(self, platform: Platform, client):
-        """Safely connect to a platform, catching exceptions"""
-        try:
-            await client.connect()
-            return True
-        except Exception as e:
-            return e
-    
     async def disconnect(self, platform: Platform):
         """Disconnect from a specific platform"""
         if platform == Platform.ALL:
@@ -111,11 +103,21 @@ class UnifiedMarketingClient:
         results = {}
         
         if platform == Platform.ALL:
+            # Validate connected platforms concurrently
+            connected = [plat for plat in self.clients if self.is_connected(plat)]
+            validations = await asyncio.gather(
+                *(self.clients[plat].validate_credentials() for plat in connected),
+                return_exceptions=True
+            )
+            validated = {}
+            for plat, validation in zip(connected, validations):
+                # One platform's failure only marks that platform invalid
+                if isinstance(validation, BaseException):
+                    logger.warning(f"Failed to validate credentials for {plat.value}: {validation}")
+                    validation = False
+                validated[plat] = validation
             for plat in self.clients:
-                if self.is_connected(plat):
-                    results[plat.value] = await self.clients[plat].validate_credentials()
-                else:
-                    results[plat.value] = False
+                results[plat.value] = validated.get(plat, False)
         else:
             if self.is_connected(platform):
                 results[platform.value] = await self.clients[platform].validate_credentials()
@@ -369,6 +371,14 @@ class UnifiedMarketingClient:
             "platform_details": {}
         }
         
+        # Validate credentials of all connected platforms concurrently
+        connected = [platform for platform in self.clients if self.is_connected(platform)]
+        validations = await asyncio.gather(
+            *(self.clients[platform].validate_credentials() for platform in connected),
+            return_exceptions=True
+        )
+        authenticated = dict(zip(connected, validations))
+        
         for platform in self.clients:
             platform_status = {
                 "connected": self.is_connected(platform),
@@ -378,7 +388,9 @@ class UnifiedMarketingClient:
             
             if self.is_connected(platform):
                 try:
-                    platform_status["authenticated"] = await self.clients[platform].validate_credentials()
+                    if isinstance(authenticated[platform], Exception):
+                        raise authenticated[platform]
+                    platform_status["authenticated"] = authenticated[platform]
                     # Get rate limit info
                     rate_limiter = self.clients[platform].rate_limiter
                     platform_status["rate_limit_status"] = {
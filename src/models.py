@@ -3,7 +3,7 @@
 from datetime import datetime
 from typing import List, Dict, Optional, Any
 from enum import Enum
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, ConfigDict, Field, validator
 
 
 class ReportFormat(str, Enum):
@@ -58,6 +58,8 @@ class SegmentCriteria(str, Enum):
 # Input Models
 class GenerateCampaignReportInput(BaseModel):
     """Input schema for generate_campaign_report tool"""
+    model_config = ConfigDict(extra='ignore', validate_assignment=False, str_strip_whitespace=False, frozen=True)
+    
     campaign_ids: List[str] = Field(..., description="List of campaign IDs to include in report")
     date_range: Dict[str, str] = Field(..., description="Date range with 'start' and 'end' keys (ISO format)")
     metrics: List[MetricType] = Field(..., description="Metrics to include in the report")
@@ -79,6 +81,8 @@ class GenerateCampaignReportInput(BaseModel):
 
 class OptimizeCampaignBudgetInput(BaseModel):
     """Input schema for optimize_campaign_budget tool"""
+    model_config = ConfigDict(extra='ignore', validate_assignment=False, str_strip_whitespace=False, frozen=True)
+    
     campaign_ids: List[str] = Field(..., description="Campaign IDs to optimize")
     total_budget: float = Field(..., gt=0, description="Total budget to allocate")
     optimization_goal: str = Field(..., description="Goal: 'maximize_conversions', 'maximize_roi', 'maximize_reach'")
@@ -89,6 +93,8 @@ class OptimizeCampaignBudgetInput(BaseModel):
 
 class CreateCampaignCopyInput(BaseModel):
     """Input schema for create_campaign_copy tool"""
+    model_config = ConfigDict(extra='ignore', validate_assignment=False, str_strip_whitespace=False, frozen=True)
+    
     product_name: str = Field(..., description="Name of the product/service")
     product_description: str = Field(..., description="Description of the product/service")
     target_audience: str = Field(..., description="Target audience description")
@@ -102,6 +108,8 @@ class CreateCampaignCopyInput(BaseModel):
 
 class AnalyzeAudienceSegmentsInput(BaseModel):
     """Input schema for analyze_audience_segments tool"""
+    model_config = ConfigDict(extra='ignore', validate_assignment=False, str_strip_whitespace=False, frozen=True)
+    
     contact_list_id: str = Field(..., description="ID of the contact list to analyze")
     criteria: List[SegmentCriteria] = Field(..., description="Criteria to use for segmentation")
     min_segment_size: int = Field(default=100, ge=10, description="Minimum contacts per segment")
@@ -2,6 +2,7 @@
 
 from .marketing_tools import (
     generate_campaign_report,
+    stream_campaign_report,
     optimize_campaign_budget,
     create_campaign_copy,
     analyze_audience_segments
@@ -9,6 +10,7 @@ from .marketing_tools import (
 
 __all__ = [
     "generate_campaign_report",
+    "stream_campaign_report",
     "optimize_campaign_budget", 
     "create_campaign_copy",
     "analyze_audience_segments"
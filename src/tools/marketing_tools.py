@@ -1,10 +1,14 @@
 """Implementation of marketing automation tools"""
 
+import os
 import uuid
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 import random
 import json
+import string
+
+import numpy as np
 
 from ..models import (
     GenerateCampaignReportInput,
@@ -25,89 +29,232 @@ from ..models import (
 )
 
 
+# Range of the simulated budget multiplier for each optimization goal
+OPTIMIZATION_FACTOR_RANGES = {
+    "maximize_conversions": (0.8, 1.5),  # Favor campaigns with high conversion potential
+    "maximize_roi": (0.7, 1.6),  # Favor campaigns with highest ROI
+    "maximize_reach": (0.9, 1.2)  # More even distribution with slight variations
+}
+
+# Upside and downside ranges of expected impact for increased vs reduced budgets
+EXPECTED_IMPACT_RANGES = {
+    "conversions": ((1.1, 1.5), (0.8, 0.95)),
+    "roi": ((1.05, 1.3), (0.85, 0.98)),
+    "reach": ((1.02, 1.2), (0.9, 0.99))
+}
+
+# Templates for different copy types and tones
+COPY_TEMPLATES = {
+    "email_subject": {
+        "professional": (
+            "{product_name}: Enhance Your {benefit}",
+            "Introducing {product_name} - {value_prop}",
+            "{action} with {product_name}"
+        ),
+        "casual": (
+            "Hey! Check out {product_name}",
+            "{product_name} is here!",
+            "You're going to love {product_name}"
+        ),
+        "urgent": (
+            "Last chance: {product_name} {offer}",
+            "Hurry! {product_name} {time_limit}",
+            "Don't miss out on {product_name}"
+        )
+    },
+    "email_body": {
+        "professional": (
+            "Dear Valued Customer,\n\nWe're pleased to introduce {product_name}, {product_description}.\n\n{benefits}\n\n{cta}",
+            "Greetings,\n\n{product_name} offers {value_prop}. {product_description}\n\n{features}\n\n{cta}"
+        ),
+        "casual": (
+            "Hi there!\n\n{product_name} is exactly what you've been looking for. {product_description}\n\n{benefits}\n\n{cta}",
+            "Hey!\n\nExcited to share {product_name} with you! {product_description}\n\n{features}\n\n{cta}"
+        )
+    },
+    "ad_headline": {
+        "professional": ("{product_name}: {value_prop}", "{action} with {product_name}"),
+        "persuasive": ("Transform Your {benefit} with {product_name}", "Why {audience} Choose {product_name}")
+    },
+    "social_post": {
+        "friendly": ("Loving our new {product_name}! {product_description} {hashtags}", "Check out {product_name}! Perfect for {audience} {cta} {hashtags}"),
+        "informative": ("{product_name} helps you {benefit}. {product_description} Learn more: {cta}", "Did you know? {product_name} {feature}. {cta}")
+    }
+}
+
+# Dynamic content used to fill in copy templates
+COPY_BENEFITS = ("increase productivity", "save time", "improve results", "enhance performance")
+COPY_FEATURES = ("advanced features", "user-friendly interface", "powerful capabilities", "seamless integration")
+COPY_ACTIONS = ("Discover", "Experience", "Unlock", "Explore")
+COPY_VALUE_PROPS = ("Revolutionary Solution", "Game-Changing Innovation", "Industry-Leading Technology")
+
+
+def _template_fields(template: str) -> tuple:
+    """Return the distinct placeholder names of a format template, in order of appearance"""
+    return tuple(dict.fromkeys(field for _, field, _, _ in string.Formatter().parse(template) if field))
+
+
+# Placeholder names of every copy template, parsed once at import
+COPY_TEMPLATE_FIELDS = {
+    template: _template_fields(template)
+    for tone_templates in COPY_TEMPLATES.values()
+    for templates in tone_templates.values()
+    for template in templates
+}
+
+# Capitalized bullet text for the benefits/features blocks
+COPY_BENEFIT_BULLETS = tuple(benefit.capitalize() for benefit in COPY_BENEFITS)
+COPY_FEATURE_BULLETS = tuple(feature.capitalize() for feature in COPY_FEATURES)
+
+# Ratio ranges drawn per campaign by the simulated metrics kernel, one row per derived metric:
+# delivered/sent, opens/delivered, unique_opens/opens, clicks/opens,
+# unique_clicks/clicks, conversions/clicks and revenue per conversion
+METRIC_RATIO_RANGES = np.array([
+    (0.95, 0.99),
+    (0.15, 0.35),
+    (0.7, 0.9),
+    (0.05, 0.15),
+    (0.7, 0.9),
+    (0.02, 0.10),
+    (50, 500)
+])
+
+
+def _campaign_metrics_kernel(sent: np.ndarray, ratios: np.ndarray) -> Dict[str, np.ndarray]:
+    """Derive all campaign metric columns from send volumes and pre-drawn ratios"""
+    # Chain the funnel in float space and truncate every count column in one cast
+    delivered = sent * ratios[0]
+    opens = delivered * ratios[1]
+    clicks = opens * ratios[3]
+    delivered, opens, unique_opens, clicks, unique_clicks, conversions = np.stack([
+        delivered, opens, opens * ratios[2], clicks, clicks * ratios[4], clicks * ratios[5]
+    ]).astype(np.int64)
+    revenue = conversions * ratios[6]
+    
+    n_campaigns = len(sent)
+    ctr = np.round(np.divide(clicks, delivered, out=np.zeros(n_campaigns), where=delivered > 0) * 100, 2)
+    conversion_rate = np.round(np.divide(conversions, clicks, out=np.zeros(n_campaigns), where=clicks > 0) * 100, 2)
+    send_cost = sent * 0.01  # Assuming $0.01 per email
+    roi = np.round(((revenue - send_cost) / send_cost) * 100, 2)
+    
+    return {
+        "sent": sent,
+        "delivered": delivered,
+        "opens": opens,
+        "unique_opens": unique_opens,
+        "clicks": clicks,
+        "unique_clicks": unique_clicks,
+        "conversions": conversions,
+        "revenue": revenue,
+        "ctr": ctr,
+        "conversion_rate": conversion_rate,
+        "roi": roi
+    }
+
+
+def _uuid4_batch(count: int) -> List[str]:
+    """Generate ``count`` random UUID4 strings from a single urandom read"""
+    raw = os.urandom(16 * count)
+    return [str(uuid.UUID(bytes=raw[i:i + 16], version=4)) for i in range(0, 16 * count, 16)]
+
+
+def _report_summary(column_totals: Dict[str, Any], n_campaigns: int) -> Dict[str, Any]:
+    """Build a report summary from per-metric totals over ``n_campaigns`` campaigns"""
+    return {
+        "total_sent": int(column_totals["sent"]),
+        "total_delivered": int(column_totals["delivered"]),
+        "total_opens": int(column_totals["opens"]),
+        "total_clicks": int(column_totals["clicks"]),
+        "total_conversions": int(column_totals["conversions"]),
+        "total_revenue": column_totals["revenue"],
+        "average_ctr": round(column_totals["ctr"] / n_campaigns, 2),
+        "average_conversion_rate": round(column_totals["conversion_rate"] / n_campaigns, 2),
+        "average_roi": round(column_totals["roi"] / n_campaigns, 2)
+    }
+
+
+def _report_charts(campaign_names: List[str], revenues: List[float]) -> List[Dict[str, Any]]:
+    """Build the simulated chart payloads attached to a campaign report"""
+    return [
+        {
+            "type": "line",
+            "title": "Campaign Performance Over Time",
+            "data": {
+                "labels": [f"Day {i}" for i in range(1, 8)],
+                "datasets": [
+                    {
+                        "label": "Opens",
+                        "data": np.random.randint(100, 1001, size=7).tolist()
+                    },
+                    {
+                        "label": "Clicks",
+                        "data": np.random.randint(50, 501, size=7).tolist()
+                    }
+                ]
+            }
+        },
+        {
+            "type": "bar",
+            "title": "Revenue by Campaign",
+            "data": {
+                "labels": campaign_names,
+                "values": revenues
+            }
+        }
+    ]
+
+
 async def generate_campaign_report(input_data: GenerateCampaignReportInput) -> GenerateCampaignReportOutput:
     """Generate comprehensive performance reports from campaign data"""
     
-    # Simulate campaign metrics retrieval
-    campaigns = []
-    for campaign_id in input_data.campaign_ids:
-        # Generate realistic-looking metrics
-        sent = random.randint(5000, 50000)
-        delivered = int(sent * random.uniform(0.95, 0.99))
-        opens = int(delivered * random.uniform(0.15, 0.35))
-        unique_opens = int(opens * random.uniform(0.7, 0.9))
-        clicks = int(opens * random.uniform(0.05, 0.15))
-        unique_clicks = int(clicks * random.uniform(0.7, 0.9))
-        conversions = int(clicks * random.uniform(0.02, 0.10))
-        revenue = conversions * random.uniform(50, 500)
-        
-        campaign_metrics = CampaignMetrics(
+    # Simulate campaign metrics retrieval: draw every ratio in one call, then derive the columns
+    n_campaigns = len(input_data.campaign_ids)
+    sent = np.random.randint(5000, 50001, size=n_campaigns)
+    ratios = np.random.uniform(
+        METRIC_RATIO_RANGES[:, :1], METRIC_RATIO_RANGES[:, 1:], (len(METRIC_RATIO_RANGES), n_campaigns)
+    )
+    metric_columns = _campaign_metrics_kernel(sent, ratios)
+    metric_rows = zip(*(column.tolist() for column in metric_columns.values()))
+    campaigns = [
+        CampaignMetrics(
             campaign_id=campaign_id,
             campaign_name=f"Campaign {campaign_id[-6:]}",
-            sent=sent,
-            delivered=delivered,
-            opens=opens,
-            unique_opens=unique_opens,
-            clicks=clicks,
-            unique_clicks=unique_clicks,
-            conversions=conversions,
-            revenue=revenue,
-            ctr=round((clicks / delivered) * 100, 2) if delivered > 0 else 0,
-            conversion_rate=round((conversions / clicks) * 100, 2) if clicks > 0 else 0,
-            roi=round(((revenue - (sent * 0.01)) / (sent * 0.01)) * 100, 2)  # Assuming $0.01 per email
+            **dict(zip(metric_columns, row))
         )
-        campaigns.append(campaign_metrics)
-    
-    # Calculate summary statistics
-    summary = {
-        "total_sent": sum(c.sent for c in campaigns),
-        "total_delivered": sum(c.delivered for c in campaigns),
-        "total_opens": sum(c.opens for c in campaigns),
-        "total_clicks": sum(c.clicks for c in campaigns),
-        "total_conversions": sum(c.conversions for c in campaigns),
-        "total_revenue": sum(c.revenue for c in campaigns),
-        "average_ctr": round(sum(c.ctr for c in campaigns) / len(campaigns), 2),
-        "average_conversion_rate": round(sum(c.conversion_rate for c in campaigns) / len(campaigns), 2),
-        "average_roi": round(sum(c.roi for c in campaigns) / len(campaigns), 2)
-    }
+        for campaign_id, row in zip(input_data.campaign_ids, metric_rows)
+    ]
+    
+    if n_campaigns == 1:
+        # A single campaign's totals and averages are just its own metrics
+        campaign = campaigns[0]
+        summary = {
+            "total_sent": campaign.sent,
+            "total_delivered": campaign.delivered,
+            "total_opens": campaign.opens,
+            "total_clicks": campaign.clicks,
+            "total_conversions": campaign.conversions,
+            "total_revenue": campaign.revenue,
+            "average_ctr": campaign.ctr,
+            "average_conversion_rate": campaign.conversion_rate,
+            "average_roi": campaign.roi
+        }
+    else:
+        # Calculate summary statistics with a single reduction over all metric columns
+        column_totals = dict(zip(metric_columns, np.vstack(list(metric_columns.values())).sum(axis=1).tolist()))
+        summary = _report_summary(column_totals, n_campaigns)
     
     # Generate charts data if requested
     charts = None
     if input_data.include_charts:
-        charts = [
-            {
-                "type": "line",
-                "title": "Campaign Performance Over Time",
-                "data": {
-                    "labels": [f"Day {i}" for i in range(1, 8)],
-                    "datasets": [
-                        {
-                            "label": "Opens",
-                            "data": [random.randint(100, 1000) for _ in range(7)]
-                        },
-                        {
-                            "label": "Clicks",
-                            "data": [random.randint(50, 500) for _ in range(7)]
-                        }
-                    ]
-                }
-            },
-            {
-                "type": "bar",
-                "title": "Revenue by Campaign",
-                "data": {
-                    "labels": [c.campaign_name for c in campaigns],
-                    "values": [c.revenue for c in campaigns]
-                }
-            }
-        ]
+        charts = _report_charts([c.campaign_name for c in campaigns], [c.revenue for c in campaigns])
     
     # Generate download URL for non-JSON formats
     download_url = None
     if input_data.format != ReportFormat.JSON:
         download_url = f"https://reports.marketing-automation.com/{uuid.uuid4()}.{input_data.format}"
     
-    return GenerateCampaignReportOutput(
+    # Every field is built from validated input or internal data, so skip revalidating the nested dicts
+    return GenerateCampaignReportOutput.model_construct(
         report_id=str(uuid.uuid4()),
         generated_at=datetime.utcnow(),
         date_range=input_data.date_range,
@@ -119,61 +266,104 @@ async def generate_campaign_report(input_data: GenerateCampaignReportInput) -> G
     )
 
 
+async def stream_campaign_report(input_data: GenerateCampaignReportInput) -> AsyncIterator[Dict[str, Any]]:
+    """Yield a JSON campaign report row by row, computing each campaign's metrics as it is emitted"""
+    
+    yield {
+        "record": "report",
+        "report_id": str(uuid.uuid4()),
+        "generated_at": datetime.utcnow(),
+        "date_range": input_data.date_range,
+        "format": input_data.format
+    }
+    
+    # Only running totals and chart labels are kept; each campaign row is dropped once yielded
+    column_totals = dict.fromkeys(
+        ("sent", "delivered", "opens", "clicks", "conversions", "revenue", "ctr", "conversion_rate", "roi"), 0
+    )
+    campaign_names = []
+    revenues = []
+    for campaign_id in input_data.campaign_ids:
+        sent = np.random.randint(5000, 50001, size=1)
+        ratios = np.random.uniform(
+            METRIC_RATIO_RANGES[:, :1], METRIC_RATIO_RANGES[:, 1:], (len(METRIC_RATIO_RANGES), 1)
+        )
+        metrics = {name: column.item() for name, column in _campaign_metrics_kernel(sent, ratios).items()}
+        campaign = CampaignMetrics(
+            campaign_id=campaign_id,
+            campaign_name=f"Campaign {campaign_id[-6:]}",
+            **metrics
+        )
+        for name in column_totals:
+            column_totals[name] += metrics[name]
+        if input_data.include_charts:
+            campaign_names.append(campaign.campaign_name)
+            revenues.append(campaign.revenue)
+        
+        yield {"record": "campaign", **campaign.model_dump()}
+    
+    yield {"record": "summary", **_report_summary(column_totals, len(input_data.campaign_ids))}
+    
+    if input_data.include_charts:
+        for chart in _report_charts(campaign_names, revenues):
+            yield {"record": "chart", **chart}
+
+
 async def optimize_campaign_budget(input_data: OptimizeCampaignBudgetInput) -> OptimizeCampaignBudgetOutput:
     """Use AI to suggest optimal budget reallocations"""
     
-    allocations = []
-    total_current_budget = input_data.total_budget
+    campaign_ids = input_data.campaign_ids
+    n_campaigns = len(campaign_ids)
+    current_budget = input_data.total_budget / n_campaigns
     
-    # Simulate AI-driven budget optimization
-    for i, campaign_id in enumerate(input_data.campaign_ids):
-        # Simulate current performance metrics
-        current_budget = total_current_budget / len(input_data.campaign_ids)
-        current_roi = random.uniform(100, 500)
-        
-        # Apply optimization logic based on goal
-        if input_data.optimization_goal == "maximize_conversions":
-            # Favor campaigns with high conversion potential
-            optimization_factor = random.uniform(0.8, 1.5)
-        elif input_data.optimization_goal == "maximize_roi":
-            # Favor campaigns with highest ROI
-            optimization_factor = random.uniform(0.7, 1.6)
-        else:  # maximize_reach
-            # More even distribution with slight variations
-            optimization_factor = random.uniform(0.9, 1.2)
-        
-        recommended_budget = current_budget * optimization_factor
-        
-        # Apply constraints if provided
-        if input_data.constraints:
-            min_budget = input_data.constraints.get(campaign_id, {}).get("min", 0)
-            max_budget = input_data.constraints.get(campaign_id, {}).get("max", float('inf'))
-            recommended_budget = max(min_budget, min(max_budget, recommended_budget))
-        
-        change_percentage = ((recommended_budget - current_budget) / current_budget) * 100
-        
+    # Simulate AI-driven budget optimization for all campaigns at once
+    factor_low, factor_high = OPTIMIZATION_FACTOR_RANGES.get(
+        input_data.optimization_goal, OPTIMIZATION_FACTOR_RANGES["maximize_reach"]
+    )
+    optimization_factors = np.random.uniform(factor_low, factor_high, n_campaigns)
+    recommended_budgets = current_budget * optimization_factors
+    
+    # Apply constraints if provided
+    if input_data.constraints:
+        bounds = [input_data.constraints.get(campaign_id, {}) for campaign_id in campaign_ids]
+        min_budgets = np.array([b.get("min", 0) for b in bounds], dtype=float)
+        max_budgets = np.array([b.get("max", np.inf) for b in bounds], dtype=float)
+        recommended_budgets = np.maximum(min_budgets, np.minimum(max_budgets, recommended_budgets))
+    
+    change_percentages = ((recommended_budgets - current_budget) / current_budget) * 100
+    
+    # Project impact per metric, drawing from the upside or downside range per campaign
+    increases = change_percentages > 0
+    expected_impacts = {
+        metric: np.round(np.where(
+            increases,
+            np.random.uniform(*upside, n_campaigns),
+            np.random.uniform(*downside, n_campaigns)
+        ), 2).tolist()
+        for metric, (upside, downside) in EXPECTED_IMPACT_RANGES.items()
+    }
+    
+    # Normalize to ensure total equals input budget
+    final_budgets = np.round(recommended_budgets, 2)
+    total_recommended = final_budgets.sum()
+    if total_recommended != input_data.total_budget:
+        final_budgets *= input_data.total_budget / total_recommended
+        np.round(final_budgets, 2, out=final_budgets)
+    
+    goal_label = input_data.optimization_goal.replace('_', ' ')
+    allocations = []
+    for i, campaign_id in enumerate(campaign_ids):
         allocation = BudgetAllocation(
             campaign_id=campaign_id,
             campaign_name=f"Campaign {campaign_id[-6:]}",
             current_budget=round(current_budget, 2),
-            recommended_budget=round(recommended_budget, 2),
-            change_percentage=round(change_percentage, 2),
-            expected_impact={
-                "conversions": round(random.uniform(1.1, 1.5), 2) if change_percentage > 0 else round(random.uniform(0.8, 0.95), 2),
-                "roi": round(random.uniform(1.05, 1.3), 2) if change_percentage > 0 else round(random.uniform(0.85, 0.98), 2),
-                "reach": round(random.uniform(1.02, 1.2), 2) if change_percentage > 0 else round(random.uniform(0.9, 0.99), 2)
-            },
-            reasoning=f"Based on historical performance, this campaign shows {'high' if optimization_factor > 1.2 else 'moderate'} potential for {input_data.optimization_goal.replace('_', ' ')}"
+            recommended_budget=float(final_budgets[i]),
+            change_percentage=round(float(change_percentages[i]), 2),
+            expected_impact={metric: values[i] for metric, values in expected_impacts.items()},
+            reasoning=f"Based on historical performance, this campaign shows {'high' if optimization_factors[i] > 1.2 else 'moderate'} potential for {goal_label}"
         )
         allocations.append(allocation)
     
-    # Normalize to ensure total equals input budget
-    total_recommended = sum(a.recommended_budget for a in allocations)
-    if total_recommended != input_data.total_budget:
-        scale_factor = input_data.total_budget / total_recommended
-        for allocation in allocations:
-            allocation.recommended_budget = round(allocation.recommended_budget * scale_factor, 2)
-    
     # Calculate projected improvements
     projected_improvement = {
         "conversions": round(random.uniform(1.15, 1.35), 2),
@@ -203,104 +393,83 @@ async def optimize_campaign_budget(input_data: OptimizeCampaignBudgetInput) -> O
 async def create_campaign_copy(input_data: CreateCampaignCopyInput) -> CreateCampaignCopyOutput:
     """Generate marketing copy variants using AI"""
     
-    # Templates for different copy types and tones
-    templates = {
-        "email_subject": {
-            "professional": [
-                "{product_name}: Enhance Your {benefit}",
-                "Introducing {product_name} - {value_prop}",
-                "{action} with {product_name}"
-            ],
-            "casual": [
-                "Hey! Check out {product_name}",
-                "{product_name} is here!",
-                "You're going to love {product_name}"
-            ],
-            "urgent": [
-                "Last chance: {product_name} {offer}",
-                "Hurry! {product_name} {time_limit}",
-                "Don't miss out on {product_name}"
-            ]
-        },
-        "email_body": {
-            "professional": [
-                "Dear Valued Customer,\n\nWe're pleased to introduce {product_name}, {product_description}.\n\n{benefits}\n\n{cta}",
-                "Greetings,\n\n{product_name} offers {value_prop}. {product_description}\n\n{features}\n\n{cta}"
-            ],
-            "casual": [
-                "Hi there!\n\n{product_name} is exactly what you've been looking for. {product_description}\n\n{benefits}\n\n{cta}",
-                "Hey!\n\nExcited to share {product_name} with you! {product_description}\n\n{features}\n\n{cta}"
-            ]
-        },
-        "ad_headline": {
-            "professional": ["{product_name}: {value_prop}", "{action} with {product_name}"],
-            "persuasive": ["Transform Your {benefit} with {product_name}", "Why {audience} Choose {product_name}"]
-        },
-        "social_post": {
-            "friendly": ["Loving our new {product_name}! {product_description} {hashtags}", "Check out {product_name}! Perfect for {audience} {cta} {hashtags}"],
-            "informative": ["{product_name} helps you {benefit}. {product_description} Learn more: {cta}", "Did you know? {product_name} {feature}. {cta}"]
-        }
+    # Dedicated generator for this request's template fills and scores
+    rng = random.Random()
+    
+    # Select appropriate templates and other per-request values once for all variants
+    copy_templates = COPY_TEMPLATES.get(input_data.copy_type, {}).get(input_data.tone.value)
+    if not copy_templates:
+        # Fallback template
+        copy_templates = (f"{input_data.product_name}: {input_data.product_description}",)
+    
+    hashtags = "#" + " #".join(input_data.keywords[:3]) if input_data.keywords else ""
+    cta = input_data.call_to_action or "Learn More"
+    inline_keywords = [(keyword, keyword.lower()) for keyword in (input_data.keywords or [])[:2]]
+    predicts_ctr = input_data.copy_type in ("email_subject", "ad_headline")
+    key_elements = (input_data.product_name, input_data.tone.value, input_data.copy_type)
+    variant_ids = _uuid4_batch(input_data.variants_count)
+    
+    # Values shared by every variant, plus generators for placeholders drawn per variant
+    static_fills = {
+        "product_name": input_data.product_name,
+        "product_description": input_data.product_description,
+        "audience": input_data.target_audience,
+        "cta": cta,
+        "hashtags": hashtags,
+        "offer": "Special Offer",
+        "time_limit": "Limited Time Only"
+    }
+    random_fills = {
+        "benefit": lambda: rng.choice(COPY_BENEFITS),
+        "feature": lambda: rng.choice(COPY_FEATURES),
+        "action": lambda: rng.choice(COPY_ACTIONS),
+        "value_prop": lambda: rng.choice(COPY_VALUE_PROPS),
+        "benefits": lambda: "Key benefits:\n• " + "\n• ".join(rng.choices(COPY_BENEFIT_BULLETS, k=3)),
+        "features": lambda: "Features include:\n• " + "\n• ".join(rng.choices(COPY_FEATURE_BULLETS, k=2))
     }
     
     variants = []
+    best_variant_id = None
+    best_score = -1.0
     
     # Generate copy variants
     for i in range(input_data.variants_count):
-        # Select appropriate template
-        copy_templates = templates.get(input_data.copy_type, {}).get(input_data.tone.value, [])
-        if not copy_templates:
-            # Fallback template
-            copy_templates = [f"{input_data.product_name}: {input_data.product_description}"]
-        
         template = copy_templates[i % len(copy_templates)]
         
-        # Generate dynamic content
-        benefits = ["increase productivity", "save time", "improve results", "enhance performance"]
-        features = ["advanced features", "user-friendly interface", "powerful capabilities", "seamless integration"]
-        actions = ["Discover", "Experience", "Unlock", "Explore"]
-        value_props = ["Revolutionary Solution", "Game-Changing Innovation", "Industry-Leading Technology"]
+        fields = COPY_TEMPLATE_FIELDS.get(template) or _template_fields(template)
         
-        # Fill in template
-        content = template.format(
-            product_name=input_data.product_name,
-            product_description=input_data.product_description,
-            audience=input_data.target_audience,
-            benefit=random.choice(benefits),
-            feature=random.choice(features),
-            action=random.choice(actions),
-            value_prop=random.choice(value_props),
-            benefits=f"Key benefits:\n• {random.choice(benefits).capitalize()}\n• {random.choice(benefits).capitalize()}\n• {random.choice(benefits).capitalize()}",
-            features=f"Features include:\n• {random.choice(features).capitalize()}\n• {random.choice(features).capitalize()}",
-            cta=input_data.call_to_action or "Learn More",
-            hashtags="#" + " #".join(input_data.keywords[:3]) if input_data.keywords else "",
-            offer="Special Offer",
-            time_limit="Limited Time Only"
-        )
+        # Fill in template, drawing only the placeholders it actually uses
+        fills = dict(static_fills)
+        for field in fields:
+            if field in random_fills:
+                fills[field] = random_fills[field]()
+        content = template.format_map(fills)
         
         # Include keywords if provided
-        if input_data.keywords:
-            for keyword in input_data.keywords[:2]:
-                if keyword.lower() not in content.lower():
-                    content += f" {keyword}"
+        for keyword, keyword_lower in inline_keywords:
+            if keyword_lower not in content.lower():
+                content += f" {keyword}"
         
         # Respect max_length if specified
         if input_data.max_length and len(content) > input_data.max_length:
             content = content[:input_data.max_length-3] + "..."
         
+        # Track the best variant by tone match as variants are built
+        tone_match_score = round(rng.uniform(0.85, 0.98), 2)
+        if tone_match_score > best_score:
+            best_score, best_variant_id = tone_match_score, variant_ids[i]
+        
         variant = CopyVariant(
-            variant_id=str(uuid.uuid4()),
+            variant_id=variant_ids[i],
             content=content,
-            tone_match_score=round(random.uniform(0.85, 0.98), 2),
-            predicted_ctr=round(random.uniform(2.5, 8.5), 2) if input_data.copy_type in ["email_subject", "ad_headline"] else None,
-            key_elements=[input_data.product_name, input_data.tone.value, input_data.copy_type],
+            tone_match_score=tone_match_score,
+            predicted_ctr=round(rng.uniform(2.5, 8.5), 2) if predicts_ctr else None,
+            key_elements=list(key_elements),
             character_count=len(content),
             word_count=len(content.split())
         )
         variants.append(variant)
     
-    # Select best variant based on tone match
-    best_variant = max(variants, key=lambda v: v.tone_match_score)
-    
     return CreateCampaignCopyOutput(
         copy_generation_id=str(uuid.uuid4()),
         copy_type=input_data.copy_type,
@@ -308,11 +477,11 @@ async def create_campaign_copy(input_data: CreateCampaignCopyInput) -> CreateCam
         tone=input_data.tone,
         target_audience=input_data.target_audience,
         keywords_used=input_data.keywords or [],
-        best_variant_id=best_variant.variant_id,
+        best_variant_id=best_variant_id,
         generation_metadata={
             "model": "marketing-ai-v2",
             "temperature": 0.7,
-            "generation_time_ms": random.randint(500, 1500)
+            "generation_time_ms": rng.randint(500, 1500)
         }
     )
 
@@ -348,42 +517,46 @@ async def analyze_audience_segments(input_data: AnalyzeAudienceSegmentsInput) ->
         ]
     }
     
-    used_segments = set()
+    # Flatten the requested criteria into one list of candidate segments, keeping the
+    # first occurrence of each segment name
+    templates_per_criteria = input_data.max_segments // max(1, len(input_data.criteria))
+    candidates = {}
+    for criteria in input_data.criteria:
+        for name, characteristics in segment_templates.get(criteria.value, [])[:templates_per_criteria]:
+            candidates.setdefault(name, (criteria, characteristics))
+    
+    selected = list(candidates.items())[:input_data.max_segments]
+    segment_ids = _uuid4_batch(len(selected))
     remaining_contacts = total_contacts
     
     # Create segments based on requested criteria
-    for criteria in input_data.criteria:
-        if criteria.value in segment_templates:
-            available_templates = segment_templates[criteria.value]
-            for name, characteristics in available_templates[:input_data.max_segments // len(input_data.criteria)]:
-                if name not in used_segments and len(segments) < input_data.max_segments:
-                    # Calculate segment size
-                    max_size = remaining_contacts // (input_data.max_segments - len(segments))
-                    segment_size = max(
-                        input_data.min_segment_size,
-                        random.randint(input_data.min_segment_size, max_size)
-                    )
-                    
-                    segment = AudienceSegment(
-                        segment_id=str(uuid.uuid4()),
-                        name=name,
-                        size=segment_size,
-                        criteria={criteria.value: characteristics},
-                        characteristics=characteristics,
-                        engagement_score=round(random.uniform(0.3, 0.9), 2),
-                        value_score=round(random.uniform(0.4, 0.95), 2),
-                        recommended_campaigns=random.sample([
-                            "Welcome Series",
-                            "Product Launch",
-                            "Seasonal Promotion",
-                            "Loyalty Program",
-                            "Re-engagement Campaign",
-                            "Upsell Campaign"
-                        ], k=random.randint(2, 4))
-                    )
-                    segments.append(segment)
-                    used_segments.add(name)
-                    remaining_contacts -= segment_size
+    for segment_id, (name, (criteria, characteristics)) in zip(segment_ids, selected):
+        # Calculate segment size
+        max_size = remaining_contacts // (input_data.max_segments - len(segments))
+        segment_size = max(
+            input_data.min_segment_size,
+            random.randint(input_data.min_segment_size, max_size)
+        )
+        
+        segment = AudienceSegment(
+            segment_id=segment_id,
+            name=name,
+            size=segment_size,
+            criteria={criteria.value: characteristics},
+            characteristics=characteristics,
+            engagement_score=round(random.uniform(0.3, 0.9), 2),
+            value_score=round(random.uniform(0.4, 0.95), 2),
+            recommended_campaigns=random.sample([
+                "Welcome Series",
+                "Product Launch",
+                "Seasonal Promotion",
+                "Loyalty Program",
+                "Re-engagement Campaign",
+                "Upsell Campaign"
+            ], k=random.randint(2, 4))
+        )
+        segments.append(segment)
+        remaining_contacts -= segment_size
     
     # Calculate uncategorized contacts
     uncategorized_count = max(0, remaining_contacts)
@@ -391,17 +564,24 @@ async def analyze_audience_segments(input_data: AnalyzeAudienceSegmentsInput) ->
     # Analyze overlaps if requested
     overlaps = []
     if input_data.analyze_overlap and len(segments) > 1:
-        for i in range(len(segments)):
-            for j in range(i + 1, len(segments)):
-                overlap_count = random.randint(0, min(segments[i].size, segments[j].size) // 3)
-                if overlap_count > 0:
-                    overlap = SegmentOverlap(
-                        segment_a_id=segments[i].segment_id,
-                        segment_b_id=segments[j].segment_id,
-                        overlap_count=overlap_count,
-                        overlap_percentage=round((overlap_count / min(segments[i].size, segments[j].size)) * 100, 2)
-                    )
-                    overlaps.append(overlap)
+        # Draw every segment pair's overlap at once over the upper triangle
+        sizes = np.array([segment.size for segment in segments])
+        pair_a, pair_b = np.triu_indices(len(segments), k=1)
+        smaller_sizes = np.minimum(sizes[pair_a], sizes[pair_b])
+        overlap_counts = np.random.randint(0, smaller_sizes // 3 + 1)
+        overlap_percentages = np.round(overlap_counts / smaller_sizes * 100, 2)
+        overlaps = [
+            SegmentOverlap(
+                segment_a_id=segments[i].segment_id,
+                segment_b_id=segments[j].segment_id,
+                overlap_count=count,
+                overlap_percentage=percentage
+            )
+            for i, j, count, percentage in zip(
+                pair_a.tolist(), pair_b.tolist(), overlap_counts.tolist(), overlap_percentages.tolist()
+            )
+            if count > 0
+        ]
     
     # Generate recommendations
     recommendations = []
@@ -421,11 +601,19 @@ async def analyze_audience_segments(input_data: AnalyzeAudienceSegmentsInput) ->
             }
         ]
     
+    # Find the highest value and most engaged segments in a single pass
+    best_value = best_engagement = segments[0] if segments else None
+    for segment in segments[1:]:
+        if segment.value_score > best_value.value_score:
+            best_value = segment
+        if segment.engagement_score > best_engagement.engagement_score:
+            best_engagement = segment
+    
     # Generate insights
     insights = [
         f"{len(segments)} distinct audience segments identified from {total_contacts:,} contacts",
-        f"Highest value segment: {max(segments, key=lambda s: s.value_score).name if segments else 'N/A'}",
-        f"Most engaged segment: {max(segments, key=lambda s: s.engagement_score).name if segments else 'N/A'}",
+        f"Highest value segment: {best_value.name if best_value else 'N/A'}",
+        f"Most engaged segment: {best_engagement.name if best_engagement else 'N/A'}",
         f"{uncategorized_count:,} contacts ({round(uncategorized_count/total_contacts*100, 1)}%) require further analysis"
     ]
     
@@ -3,9 +3,9 @@
 import pytest
 import asyncio
 from datetime import datetime, timedelta
+from decimal import Decimal
 from unittest.mock import Mock, AsyncMock, patch
-import os
-import tempfile
+import pickle
 from pathlib import Path
 
 # Add parent directory to path
@@ -13,34 +13,133 @@ import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.database import Base, DatabaseManager, Campaign, AutomationTask, TaskType
-from src.models import CampaignMetrics, OptimizationSuggestion, AdCopyVariant
-from sqlalchemy import create_engine
+from src.models import CampaignMetrics
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+import httpx
+import respx
 
+from src.integrations.google_ads import GoogleAdsClient
+from src.integrations.facebook_ads import FacebookAdsClient
+from src.integrations.google_analytics import GoogleAnalyticsClient
+from tests.fakes import FakeResponse
 
-@pytest.fixture(scope="session")
-def event_loop():
-    """Create an instance of the default event loop for the test session."""
-    loop = asyncio.get_event_loop_policy().new_event_loop()
-    yield loop
-    loop.close()
 
+# Campaigns with increasing performance levels, pickled once so each test gets a fresh copy cheaply
+SEED_CAMPAIGNS_BYTES = pickle.dumps([
+    {
+        "campaign": {
+            "campaign_id": f"budget_test_{i}",
+            "name": f"Campaign {i}",
+            "platform": "google_ads",
+            "budget": Decimal("1000.00"),
+            "start_date": datetime.now() - timedelta(days=30)
+        },
+        "metrics": {
+            "impressions": 10000 * (i + 1),
+            "clicks": 200 * (i + 1),
+            "conversions": 10 * (i + 1),
+            "revenue": Decimal(str(1000 * (i + 1))),
+            "cost": Decimal("500")
+        }
+    }
+    for i in range(3)
+])
+
+
+# Fake platform credentials read by the integration clients at construction
+FAKE_PLATFORM_CREDENTIALS = {
+    'GOOGLE_ADS_DEVELOPER_TOKEN': 'test_token',
+    'GOOGLE_ADS_CLIENT_ID': 'test_client_id',
+    'GOOGLE_ADS_CLIENT_SECRET': 'test_secret',
+    'GOOGLE_ADS_REFRESH_TOKEN': 'test_refresh',
+    'GOOGLE_ADS_CUSTOMER_ID': '1234567890',
+    'FACEBOOK_APP_ID': 'test_app_id',
+    'FACEBOOK_APP_SECRET': 'test_secret',
+    'FACEBOOK_ACCESS_TOKEN': 'test_token',
+    'FACEBOOK_AD_ACCOUNT_ID': '1234567890',
+    'GOOGLE_ANALYTICS_PROPERTY_ID': '123456789',
+    'GOOGLE_ANALYTICS_CLIENT_ID': 'test_client_id',
+    'GOOGLE_ANALYTICS_CLIENT_SECRET': 'test_secret',
+    'GOOGLE_ANALYTICS_REFRESH_TOKEN': 'test_refresh'
+}
+
+
+@pytest.fixture(scope="session", autouse=True)
+def fake_platform_credentials():
+    """Set fake platform credentials once for the whole test session"""
+    with pytest.MonkeyPatch.context() as mp:
+        for name, value in FAKE_PLATFORM_CREDENTIALS.items():
+            mp.setenv(name, value)
+        yield
 
-@pytest.fixture(scope="function")
+
+def pytest_asyncio_loop_factories(config, item):
+    """Run async tests on uvloop where available, falling back to the default event loop."""
+    try:
+        import uvloop
+        return {"uvloop": uvloop.new_event_loop}
+    except ImportError:
+        return {"asyncio": asyncio.new_event_loop}
+
+
+@pytest.fixture(scope="module")
 def test_db():
-    """Create a test database for each test function"""
-    # Create temporary database
-    db_fd, db_path = tempfile.mkstemp()
-    db_url = f"sqlite:///{db_path}"
+    """Create an in-memory test database shared by the tests in a module"""
+    # StaticPool keeps the single in-memory database alive and shared across sessions
+    db_manager = DatabaseManager(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
     
-    # Create database manager
-    db_manager = DatabaseManager(db_url)
+    # Durability is irrelevant for a throwaway database
+    with db_manager.engine.connect() as connection:
+        connection.exec_driver_sql("PRAGMA journal_mode=MEMORY")
+        connection.exec_driver_sql("PRAGMA synchronous=OFF")
+        connection.exec_driver_sql("PRAGMA temp_store=MEMORY")
     
     yield db_manager
     
     # Cleanup
-    os.close(db_fd)
-    os.unlink(db_path)
+    db_manager.close()
+
+
+@pytest.fixture
+def db_txn(test_db, monkeypatch):
+    """Run a test against the module's test database inside a transaction that is rolled back afterwards"""
+    connection = test_db.engine.connect()
+    
+    # pysqlite's implicit transactions break SAVEPOINTs, so let SQLAlchemy emit BEGIN itself
+    driver_connection = connection.connection.driver_connection
+    driver_connection.isolation_level = None
+    event.listen(connection, "begin", lambda conn: conn.exec_driver_sql("BEGIN"))
+    transaction = connection.begin()
+    
+    # Session commits inside the test only release savepoints of the outer transaction
+    session_factory = test_db.SessionLocal
+    test_db.SessionLocal = sessionmaker(
+        bind=connection, autoflush=False, expire_on_commit=False, join_transaction_mode="create_savepoint"
+    )
+    
+    # Helpers in database_utils write through the global manager; point them at this one
+    monkeypatch.setattr("src.database_utils.db", test_db)
+    
+    yield test_db
+    
+    # Cleanup
+    test_db.SessionLocal = session_factory
+    transaction.rollback()
+    test_db.invalidate_roi_cache()
+    driver_connection.isolation_level = ""
+    connection.close()
+
+
+@pytest.fixture
+def seed_campaigns():
+    """Campaign and performance data for multi-campaign workflow tests"""
+    return pickle.loads(SEED_CAMPAIGNS_BYTES)
 
 
 @pytest.fixture
@@ -125,6 +224,38 @@ def mock_openai_client():
         yield mock_instance
 
 
+# Canned platform API responses, built once and shared by the mocked clients
+GOOGLE_OAUTH_TOKEN_RESPONSE = FakeResponse(200, {"access_token": "mock_token", "expires_in": 3600})
+
+GOOGLE_ADS_SEARCH_RESPONSE = FakeResponse(200, {
+    "results": [{
+        "campaign": {
+            "id": "123456",
+            "name": "Test Campaign",
+            "status": "ENABLED"
+        },
+        "metrics": {
+            "impressions": 10000,
+            "clicks": 200,
+            "conversions": 10,
+            "cost_micros": 500000000
+        }
+    }]
+})
+
+FACEBOOK_INSIGHTS_RESPONSE = FakeResponse(200, {
+    "data": [{
+        "campaign_id": "789012",
+        "campaign_name": "Test FB Campaign",
+        "impressions": "15000",
+        "clicks": "300",
+        "spend": "600",
+        "conversions": 15
+    }],
+    "paging": {}
+})
+
+
 @pytest.fixture
 def mock_google_ads_client():
     """Mock Google Ads API client"""
@@ -132,30 +263,10 @@ def mock_google_ads_client():
         mock_instance = AsyncMock()
         
         # Mock authentication response
-        mock_instance.post.return_value = Mock(
-            status_code=200,
-            json=lambda: {"access_token": "mock_token", "expires_in": 3600}
-        )
+        mock_instance.post.return_value = GOOGLE_OAUTH_TOKEN_RESPONSE
         
         # Mock API responses
-        mock_instance.request.return_value = Mock(
-            status_code=200,
-            json=lambda: {
-                "results": [{
-                    "campaign": {
-                        "id": "123456",
-                        "name": "Test Campaign",
-                        "status": "ENABLED"
-                    },
-                    "metrics": {
-                        "impressions": 10000,
-                        "clicks": 200,
-                        "conversions": 10,
-                        "cost_micros": 500000000
-                    }
-                }]
-            }
-        )
+        mock_instance.request.return_value = GOOGLE_ADS_SEARCH_RESPONSE
         
         mock_client.return_value = mock_instance
         yield mock_instance
@@ -168,25 +279,81 @@ def mock_facebook_ads_client():
         mock_instance = AsyncMock()
         
         # Mock API responses
-        mock_instance.request.return_value = Mock(
-            status_code=200,
-            json=lambda: {
-                "data": [{
-                    "campaign_id": "789012",
-                    "campaign_name": "Test FB Campaign",
-                    "impressions": "15000",
-                    "clicks": "300",
-                    "spend": "600",
-                    "conversions": 15
-                }],
-                "paging": {}
-            }
-        )
+        mock_instance.request.return_value = FACEBOOK_INSIGHTS_RESPONSE
         
         mock_client.return_value = mock_instance
         yield mock_instance
 
 
+@pytest.fixture(scope="module")
+def ads_router():
+    """respx router with the ad platform API responses, built once per module"""
+    router = respx.mock(assert_all_called=False)
+    
+    google_ads_customer_url = f"{GoogleAdsClient.BASE_URL}/{GoogleAdsClient.API_VERSION}/customers/1234567890"
+    router.post("https://oauth2.googleapis.com/token").mock(
+        return_value=httpx.Response(200, json=GOOGLE_OAUTH_TOKEN_RESPONSE.json_data)
+    )
+    router.post(f"{google_ads_customer_url}/googleAds:search").mock(
+        return_value=httpx.Response(200, json={"results": [{"campaignBudget": {"id": "999"}}]})
+    )
+    router.post(f"{google_ads_customer_url}/campaignBudgets:mutate").mock(
+        return_value=httpx.Response(200, json={"results": []})
+    )
+    
+    router.post(f"{google_ads_customer_url}/googleAds:searchStream", name="google_ads_search_stream").mock(
+        return_value=httpx.Response(200, json={
+            "results": [{
+                "results": [{
+                    **GOOGLE_ADS_SEARCH_RESPONSE.json_data["results"][0],
+                    "segments": {"date": "2024-01-15"}
+                }]
+            }]
+        })
+    )
+    
+    facebook_url = f"{FacebookAdsClient.BASE_URL}/{FacebookAdsClient.API_VERSION}"
+    router.get(f"{facebook_url}/789012/insights", name="facebook_insights").mock(
+        return_value=httpx.Response(200, json=FACEBOOK_INSIGHTS_RESPONSE.json_data)
+    )
+    router.get(f"{facebook_url}/789012").mock(
+        return_value=httpx.Response(200, json={"adsets": {"data": [{"id": "adset_001"}]}})
+    )
+    router.post(f"{facebook_url}/adset_001").mock(
+        return_value=httpx.Response(200, json={"success": True})
+    )
+    
+    ga_property_url = f"{GoogleAnalyticsClient.BASE_URL}/{GoogleAnalyticsClient.API_VERSION}/properties/123456789"
+    router.post(f"{ga_property_url}:runReport", name="ga_run_report").mock(
+        return_value=httpx.Response(200, json={
+            "rows": [{
+                "dimensionValues": [
+                    {"value": "camp_001"},
+                    {"value": "Summer Campaign"},
+                    {"value": "2024-01-15"}
+                ],
+                "metricValues": [
+                    {"value": "1000"},  # sessions
+                    {"value": "500"},   # users
+                    {"value": "50"}     # conversions
+                ]
+            }]
+        })
+    )
+    
+    return router
+
+
+@pytest.fixture
+def ads_respx(ads_router):
+    """Intercept httpx traffic with the shared ad platform router for one test
+    
+    Leaving the router rolls back routes the test added and resets call history.
+    """
+    with ads_router:
+        yield ads_router
+
+
 @pytest.fixture
 def mock_report_data():
     """Sample data for report generation tests"""
@@ -0,0 +1,18 @@
+"""Lightweight test doubles and fixed values shared by the test suite"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, NamedTuple
+
+
+# Fixed reference time so date arguments are deterministic across tests
+FROZEN_NOW = datetime(2024, 2, 1)
+FROZEN_WEEK_AGO = FROZEN_NOW - timedelta(days=7)
+
+
+class FakeResponse(NamedTuple):
+    """Minimal stand-in for an httpx.Response returned by a mocked client"""
+    status_code: int
+    json_data: Dict[str, Any]
+    
+    def json(self) -> Dict[str, Any]:
+        return self.json_data
@@ -2,25 +2,25 @@
 
 import pytest
 import asyncio
+import json
 from datetime import datetime, timedelta
-from unittest.mock import patch, Mock, AsyncMock
+from unittest.mock import patch, AsyncMock
 from decimal import Decimal
 
-from src.database import TaskType, TaskStatus
+from src.database import TaskType, TaskStatus, AutomationTask, PerformanceMetrics, AIDecisionHistory
 from src.database_utils import AutomationTracker, track_campaign_optimization
 from src.integrations.unified_client import UnifiedMarketingClient, Platform
 from src.ai_engine import MarketingAIEngine
-from src.reporting import ReportGenerator
 
 
 class TestCompleteMarketingWorkflows:
     """Test end-to-end marketing automation workflows"""
     
     @pytest.mark.asyncio
-    async def test_campaign_optimization_workflow(self, test_db, mock_openai_client):
+    async def test_campaign_optimization_workflow(self, db_txn, mock_openai_client):
         """Test complete campaign optimization workflow"""
         # Step 1: Create a campaign
-        campaign = test_db.create_campaign({
+        campaign = db_txn.create_campaign({
             "campaign_id": "workflow_001",
             "name": "Q4 Holiday Campaign",
             "platform": "google_ads",
@@ -37,14 +37,14 @@ class TestCompleteMarketingWorkflows:
             campaign_id=campaign.id
         ) as tracker:
             # Simulate performance analysis
-            await asyncio.sleep(0.1)  # Simulate work
+            await asyncio.sleep(0)  # Yield to the loop in place of real work
             tracker.set_result("metrics_analyzed", 5)
             tracker.set_result("insights_generated", 3)
             tracker.increment_items(1)
         
         # Verify task was tracked
-        with test_db.get_session() as session:
-            tasks = session.query(test_db.__class__).filter_by(
+        with db_txn.get_session() as session:
+            tasks = session.query(AutomationTask).filter_by(
                 campaign_id=campaign.id,
                 task_type=TaskType.PERFORMANCE_ANALYSIS
             ).all()
@@ -52,7 +52,7 @@ class TestCompleteMarketingWorkflows:
             assert tasks[0].status == TaskStatus.COMPLETED
         
         # Step 3: Record performance metrics
-        metrics = test_db.record_performance_metrics(
+        metrics = db_txn.record_performance_metrics(
             campaign_id=campaign.id,
             metrics={
                 "impressions": 100000,
@@ -87,7 +87,7 @@ class TestCompleteMarketingWorkflows:
         assert decision.campaign_id == campaign.id
         
         # Step 5: Calculate ROI
-        roi_tracking = test_db.calculate_period_roi(
+        roi_tracking = db_txn.calculate_period_roi(
             period_start=datetime.now() - timedelta(days=7),
             period_end=datetime.now(),
             campaign_id=campaign.id
@@ -147,30 +147,18 @@ class TestCompleteMarketingWorkflows:
             assert result["summary"]["total_campaigns"] == 2
     
     @pytest.mark.asyncio
-    async def test_ai_driven_budget_reallocation(self, test_db, mock_openai_client):
+    async def test_ai_driven_budget_reallocation(self, db_txn, mock_openai_client, seed_campaigns):
         """Test AI-driven budget reallocation across campaigns"""
         # Create multiple campaigns
         campaigns = []
-        for i in range(3):
-            campaign = test_db.create_campaign({
-                "campaign_id": f"budget_test_{i}",
-                "name": f"Campaign {i}",
-                "platform": "google_ads",
-                "budget": Decimal("1000.00"),
-                "start_date": datetime.now() - timedelta(days=30)
-            })
+        for seed in seed_campaigns:
+            campaign = db_txn.create_campaign(seed["campaign"])
             campaigns.append(campaign)
             
             # Add different performance levels
-            test_db.record_performance_metrics(
+            db_txn.record_performance_metrics(
                 campaign_id=campaign.id,
-                metrics={
-                    "impressions": 10000 * (i + 1),
-                    "clicks": 200 * (i + 1),
-                    "conversions": 10 * (i + 1),
-                    "revenue": Decimal(str(1000 * (i + 1))),
-                    "cost": Decimal("500")
-                }
+                metrics=seed["metrics"]
             )
         
         # Create AI engine and analyze
@@ -200,9 +188,9 @@ class TestCompleteMarketingWorkflows:
         
         # Execute budget reallocation workflow
         campaign_data = []
-        with test_db.get_session() as session:
+        with db_txn.get_session() as session:
             for campaign in campaigns:
-                perf = session.query(test_db.__class__).filter_by(
+                perf = session.query(PerformanceMetrics).filter_by(
                     campaign_id=campaign.id
                 ).first()
                 if perf:
@@ -224,10 +212,10 @@ class TestCompleteMarketingWorkflows:
         assert len(chain_result["steps"]) >= 3
     
     @pytest.mark.asyncio
-    async def test_automated_reporting_workflow(self, test_db, mock_report_data):
+    async def test_automated_reporting_workflow(self, db_txn, mock_report_data):
         """Test automated report generation workflow"""
         # Create test campaign with data
-        campaign = test_db.create_campaign({
+        campaign = db_txn.create_campaign({
             "campaign_id": "report_test",
             "name": "Report Test Campaign",
             "platform": "google_ads",
@@ -236,17 +224,19 @@ class TestCompleteMarketingWorkflows:
         })
         
         # Add performance data
-        for i in range(7):
-            test_db.record_performance_metrics(
-                campaign_id=campaign.id,
-                metrics={
+        db_txn.record_performance_metrics_bulk(
+            campaign_id=campaign.id,
+            metrics_rows=[
+                {
                     "impressions": 10000 + i * 1000,
                     "clicks": 200 + i * 20,
                     "conversions": 10 + i,
                     "revenue": Decimal(str(1000 + i * 100)),
                     "cost": Decimal(str(200 + i * 10))
                 }
-            )
+                for i in range(7)
+            ]
+        )
         
         # Track report generation task
         async with AutomationTracker(
@@ -256,31 +246,15 @@ class TestCompleteMarketingWorkflows:
             hourly_rate=50.0,
             campaign_id=campaign.id
         ) as tracker:
-            # Simulate report generation
-            report_gen = ReportGenerator()
-            
-            # Mock the database queries
-            with patch.object(test_db, 'get_session') as mock_session:
-                mock_context = Mock()
-                mock_context.__enter__ = Mock(return_value=Mock(
-                    query=Mock(return_value=Mock(
-                        filter=Mock(return_value=Mock(
-                            all=Mock(return_value=[campaign])
-                        ))
-                    ))
-                ))
-                mock_context.__exit__ = Mock(return_value=None)
-                mock_session.return_value = mock_context
-                
-                # Generate report (would normally query real data)
-                # For test, we'll just verify the structure
-                tracker.set_result("pages_generated", 4)
-                tracker.set_result("charts_created", 6)
-                tracker.increment_items(1)
+            # Simulate report generation against the campaign data seeded above
+            # For test, we'll just verify the structure
+            tracker.set_result("pages_generated", 4)
+            tracker.set_result("charts_created", 6)
+            tracker.increment_items(1)
         
         # Verify automation tracking
-        with test_db.get_session() as session:
-            report_task = session.query(test_db.__class__).filter_by(
+        with db_txn.get_session() as session:
+            report_task = session.query(AutomationTask).filter_by(
                 task_type=TaskType.REPORT_GENERATION,
                 campaign_id=campaign.id
             ).first()
@@ -291,10 +265,10 @@ class TestCompleteMarketingWorkflows:
             assert report_task.cost_saved > 0
     
     @pytest.mark.asyncio
-    async def test_complete_optimization_cycle(self, test_db):
+    async def test_complete_optimization_cycle(self, db_txn):
         """Test a complete optimization cycle with feedback loop"""
         # Phase 1: Initial campaign setup
-        campaign = test_db.create_campaign({
+        campaign = db_txn.create_campaign({
             "campaign_id": "cycle_test",
             "name": "Optimization Cycle Test",
             "platform": "google_ads",
@@ -303,21 +277,23 @@ class TestCompleteMarketingWorkflows:
         })
         
         # Phase 2: Initial performance (baseline)
-        for day in range(30):
-            test_db.record_performance_metrics(
-                campaign_id=campaign.id,
-                metrics={
+        db_txn.record_performance_metrics_bulk(
+            campaign_id=campaign.id,
+            metrics_rows=[
+                {
                     "impressions": 5000,
                     "clicks": 100,
                     "conversions": 5,
                     "revenue": Decimal("500"),
                     "cost": Decimal("100")
-                },
-                is_automated=False
-            )
+                }
+                for day in range(30)
+            ],
+            is_automated=False
+        )
         
         # Phase 3: Apply automation and AI optimization
-        decision = test_db.record_ai_decision(
+        decision = db_txn.record_ai_decision(
             decision_type="campaign_optimization",
             input_data={"avg_ctr": 2.0, "avg_conversion_rate": 5.0},
             decision_made={
@@ -331,28 +307,31 @@ class TestCompleteMarketingWorkflows:
         )
         
         # Phase 4: Record improved performance
-        for day in range(30):
-            test_db.record_performance_metrics(
-                campaign_id=campaign.id,
-                metrics={
+        db_txn.record_performance_metrics_bulk(
+            campaign_id=campaign.id,
+            metrics_rows=[
+                {
                     "impressions": 5500,
                     "clicks": 138,  # 2.5% CTR
                     "conversions": 9,  # 6.5% conversion rate
                     "revenue": Decimal("900"),
                     "cost": Decimal("115")
-                },
-                is_automated=True,
-                automation_applied=["bid_optimization", "audience_targeting"]
-            )
+                }
+                for day in range(30)
+            ],
+            is_automated=True,
+            automation_applied=["bid_optimization", "audience_targeting"]
+        )
         
         # Phase 5: Measure actual impact
-        test_db.update_ai_decision_outcome(
+        db_txn.queue_ai_decision_outcome(
             decision_id=decision.decision_id,
             actual_impact={"ctr": 2.5, "conversion_rate": 6.5}
         )
+        assert db_txn.flush_ai_decision_outcomes() == 1
         
         # Phase 6: Calculate overall ROI
-        roi_report = test_db.calculate_period_roi(
+        roi_report = db_txn.calculate_period_roi(
             period_start=datetime.now() - timedelta(days=60),
             period_end=datetime.now(),
             campaign_id=campaign.id
@@ -364,8 +343,8 @@ class TestCompleteMarketingWorkflows:
         assert roi_report.roi_percentage > 0
         
         # Verify decision tracking
-        with test_db.get_session() as session:
-            updated_decision = session.query(test_db.__class__).filter_by(
+        with db_txn.get_session() as session:
+            updated_decision = session.query(AIDecisionHistory).filter_by(
                 decision_id=decision.decision_id
             ).first()
             assert updated_decision.success_score >= 90  # Met expectations
\ No newline at end of file
@@ -1,8 +1,7 @@
 """Unit tests for AI engine and decision making"""
 
 import pytest
-import json
-from datetime import datetime, timedelta
+import orjson
 from unittest.mock import patch, Mock, AsyncMock
 
 from src.ai_engine import (
@@ -12,17 +11,98 @@ from src.ai_engine import (
     AdCopyVariant,
     DecisionType
 )
+from tests.fakes import FROZEN_NOW, FROZEN_WEEK_AGO
+
+
+# OpenAI responses shared by the tests below, built once at import
+OPTIMIZATION_SUGGESTIONS_ARGUMENTS = orjson.dumps({
+    "suggestions": [
+        {
+            "type": "budget_reallocation",
+            "campaign_id": "camp_001",
+            "action": "Increase budget by 20%",
+            "predicted_impact": {
+                "roi_change": 15.0,
+                "conversion_change": 10.0,
+                "cost_change": 20.0
+            },
+            "confidence": 0.85,
+            "reasoning": "High performing campaign with room for growth",
+            "implementation_steps": ["Step 1", "Step 2"]
+        }
+    ],
+    "budget_allocation": {"camp_001": 12000},
+    "expected_overall_impact": {
+        "total_roi": 4.5,
+        "total_conversions": 150,
+        "total_revenue": 7500
+    }
+}).decode()
+
+AD_COPY_ARGUMENTS = orjson.dumps({
+    "variants": [
+        {
+            "headline": "Transform Your Marketing",
+            "description": "AI-powered automation that delivers results",
+            "call_to_action": "Start Free Trial",
+            "target_audience": "Marketing managers",
+            "tone": "professional",
+            "predicted_ctr": 3.5,
+            "keywords": ["AI", "automation", "marketing"]
+        },
+        {
+            "headline": "Boost ROI with AI",
+            "description": "Smart automation for modern marketers",
+            "call_to_action": "Get Started",
+            "target_audience": "Marketing managers",
+            "tone": "professional",
+            "predicted_ctr": 3.2,
+            "keywords": ["ROI", "AI", "automation"]
+        }
+    ],
+    "recommendations": {
+        "best_variant_index": 0,
+        "a_b_test_suggestion": "Test both variants",
+        "platform_specific_tips": ["Use sitelinks", "Add extensions"]
+    }
+}).decode()
+
+PROMPT_CHAIN_RESPONSES = [
+    # Step 1: Performance analysis
+    Mock(choices=[Mock(message=Mock(function_call=Mock(arguments=orjson.dumps({
+        "campaigns": [{"campaign_id": "camp_001", "trend": "improving"}],
+        "summary": {"total_campaigns": 1}
+    }).decode())))]),
+    # Step 2: Trend prediction
+    Mock(choices=[Mock(message=Mock(content="Positive trend expected"))]),
+    # Step 3: Optimization
+    Mock(choices=[Mock(message=Mock(function_call=Mock(arguments=orjson.dumps({
+        "suggestions": [{
+            "type": "budget_reallocation",
+            "campaign_id": "camp_001",
+            "action": "Increase budget",
+            "predicted_impact": {"roi_change": 10},
+            "confidence": 0.8,
+            "reasoning": "Good performance"
+        }]
+    }).decode())))])
+]
 
 
 class TestMarketingAIEngine:
     """Test AI engine functionality"""
     
-    @pytest.fixture
+    @pytest.fixture(scope="session")
     def ai_engine(self):
-        """Create AI engine with mocked OpenAI"""
+        """Create AI engine once for the whole test session"""
         with patch.dict('os.environ', {'OPENAI_API_KEY': 'test_key'}):
             return MarketingAIEngine(model="gpt-4-turbo-preview")
     
+    @pytest.fixture(autouse=True)
+    def use_mock_openai_client(self, ai_engine, mock_openai_client):
+        """Point the shared engine at this test's mocked OpenAI client"""
+        ai_engine.client = mock_openai_client
+    
     @pytest.mark.asyncio
     async def test_analyze_campaign_performance(self, ai_engine, mock_openai_client):
         """Test campaign performance analysis"""
@@ -42,8 +122,8 @@ class TestMarketingAIEngine:
         
         result = await ai_engine.analyze_campaign_performance(
             campaigns=campaigns,
-            start_date=datetime.now() - timedelta(days=7),
-            end_date=datetime.now(),
+            start_date=FROZEN_WEEK_AGO,
+            end_date=FROZEN_NOW,
             benchmarks={"ctr": 2.0, "conversion_rate": 3.0}
         )
         
@@ -62,29 +142,7 @@ class TestMarketingAIEngine:
     async def test_generate_optimization_suggestions(self, ai_engine, mock_openai_client):
         """Test optimization suggestion generation"""
         # Mock OpenAI response for optimization
-        mock_openai_client.chat.completions.create.return_value.choices[0].message.function_call.arguments = json.dumps({
-            "suggestions": [
-                {
-                    "type": "budget_reallocation",
-                    "campaign_id": "camp_001",
-                    "action": "Increase budget by 20%",
-                    "predicted_impact": {
-                        "roi_change": 15.0,
-                        "conversion_change": 10.0,
-                        "cost_change": 20.0
-                    },
-                    "confidence": 0.85,
-                    "reasoning": "High performing campaign with room for growth",
-                    "implementation_steps": ["Step 1", "Step 2"]
-                }
-            ],
-            "budget_allocation": {"camp_001": 12000},
-            "expected_overall_impact": {
-                "total_roi": 4.5,
-                "total_conversions": 150,
-                "total_revenue": 7500
-            }
-        })
+        mock_openai_client.chat.completions.create.return_value.choices[0].message.function_call.arguments = OPTIMIZATION_SUGGESTIONS_ARGUMENTS
         
         campaigns = [
             CampaignPerformance(
@@ -118,33 +176,7 @@ class TestMarketingAIEngine:
     async def test_create_personalized_ad_copy(self, ai_engine, mock_openai_client):
         """Test personalized ad copy generation"""
         # Mock OpenAI response for ad copy
-        mock_openai_client.chat.completions.create.return_value.choices[0].message.function_call.arguments = json.dumps({
-            "variants": [
-                {
-                    "headline": "Transform Your Marketing",
-                    "description": "AI-powered automation that delivers results",
-                    "call_to_action": "Start Free Trial",
-                    "target_audience": "Marketing managers",
-                    "tone": "professional",
-                    "predicted_ctr": 3.5,
-                    "keywords": ["AI", "automation", "marketing"]
-                },
-                {
-                    "headline": "Boost ROI with AI",
-                    "description": "Smart automation for modern marketers",
-                    "call_to_action": "Get Started",
-                    "target_audience": "Marketing managers",
-                    "tone": "professional",
-                    "predicted_ctr": 3.2,
-                    "keywords": ["ROI", "AI", "automation"]
-                }
-            ],
-            "recommendations": {
-                "best_variant_index": 0,
-                "a_b_test_suggestion": "Test both variants",
-                "platform_specific_tips": ["Use sitelinks", "Add extensions"]
-            }
-        })
+        mock_openai_client.chat.completions.create.return_value.choices[0].message.function_call.arguments = AD_COPY_ARGUMENTS
         
         result = await ai_engine.create_personalized_ad_copy(
             product_name="Marketing AI Platform",
@@ -186,26 +218,7 @@ class TestMarketingAIEngine:
     async def test_prompt_chain_execution(self, ai_engine, mock_openai_client):
         """Test executing a prompt chain"""
         # Mock responses for each step
-        mock_openai_client.chat.completions.create.side_effect = [
-            # Step 1: Performance analysis
-            Mock(choices=[Mock(message=Mock(function_call=Mock(arguments=json.dumps({
-                "campaigns": [{"campaign_id": "camp_001", "trend": "improving"}],
-                "summary": {"total_campaigns": 1}
-            }))))]),
-            # Step 2: Trend prediction
-            Mock(choices=[Mock(message=Mock(content="Positive trend expected"))]),
-            # Step 3: Optimization
-            Mock(choices=[Mock(message=Mock(function_call=Mock(arguments=json.dumps({
-                "suggestions": [{
-                    "type": "budget_reallocation",
-                    "campaign_id": "camp_001",
-                    "action": "Increase budget",
-                    "predicted_impact": {"roi_change": 10},
-                    "confidence": 0.8,
-                    "reasoning": "Good performance"
-                }]
-            }))))])
-        ]
+        mock_openai_client.chat.completions.create.side_effect = PROMPT_CHAIN_RESPONSES
         
         result = await ai_engine.create_budget_reallocation_chain(
             campaigns=[{"campaign_id": "camp_001", "metrics": {"clicks": 100}}],
@@ -228,8 +241,8 @@ class TestMarketingAIEngine:
         with pytest.raises(Exception, match="API Error"):
             await ai_engine.analyze_campaign_performance(
                 campaigns=[],
-                start_date=datetime.now(),
-                end_date=datetime.now()
+                start_date=FROZEN_NOW,
+                end_date=FROZEN_NOW
             )
     
     @pytest.mark.asyncio
@@ -292,4 +305,79 @@ class TestAIDecisionTracking:
             updated = session.query(test_db.__class__).filter_by(
                 decision_id=decision.decision_id
             ).first()
-            assert updated.success_score > 100  # Exceeded expectations
\ No newline at end of file
+            assert updated.success_score > 100  # Exceeded expectations
+    
+    def test_flush_queued_outcomes_scores_decisions(self, db_txn):
+        """Test queued outcomes are written and scored by one flush"""
+        from src.database import AIDecisionHistory, DecisionType
+        
+        decision = db_txn.record_ai_decision(
+            decision_type=DecisionType.BUDGET_ALLOCATION,
+            input_data={"current_budget": 1000},
+            decision_made={"new_budget": 1200},
+            confidence_score=0.85,
+            reasoning="High performing campaign",
+            expected_impact={"roi_increase": 15}
+        )
+        
+        db_txn.queue_ai_decision_outcome(decision.decision_id, {"roi_increase": 18})
+        
+        assert db_txn.flush_ai_decision_outcomes() == 1
+        assert db_txn._pending_outcomes == []
+        with db_txn.get_session() as session:
+            updated = session.query(AIDecisionHistory).filter_by(decision_id=decision.decision_id).one()
+            assert updated.actual_impact == {"roi_increase": 18}
+            assert updated.success_score == pytest.approx(120)
+    
+    def test_flush_drops_unknown_decisions_with_warning(self, db_txn, caplog):
+        """Test an unknown decision id is reported without failing the rest of the batch"""
+        from src.database import AIDecisionHistory, DecisionType
+        
+        decision = db_txn.record_ai_decision(
+            decision_type=DecisionType.BUDGET_ALLOCATION,
+            input_data={},
+            decision_made={"new_budget": 1200},
+            confidence_score=0.85,
+            reasoning="High performing campaign",
+            expected_impact={"roi_increase": 15}
+        )
+        
+        db_txn.queue_ai_decision_outcome("decision_missing", {"roi_increase": 10})
+        db_txn.queue_ai_decision_outcome(decision.decision_id, {"roi_increase": 15})
+        
+        with caplog.at_level("WARNING", logger="src.database"):
+            assert db_txn.flush_ai_decision_outcomes() == 1
+        
+        assert "decision_missing" in caplog.text
+        assert db_txn._pending_outcomes == []
+        with db_txn.get_session() as session:
+            updated = session.query(AIDecisionHistory).filter_by(decision_id=decision.decision_id).one()
+            assert updated.success_score == pytest.approx(100)
+    
+    def test_failed_flush_keeps_outcomes_queued(self, db_txn):
+        """Test outcomes stay queued when the flush's commit fails"""
+        from sqlalchemy.orm import Session
+        from src.database import AIDecisionHistory, DecisionType
+        
+        decision = db_txn.record_ai_decision(
+            decision_type=DecisionType.BUDGET_ALLOCATION,
+            input_data={},
+            decision_made={"new_budget": 1200},
+            confidence_score=0.85,
+            reasoning="High performing campaign",
+            expected_impact={"roi_increase": 15}
+        )
+        db_txn.queue_ai_decision_outcome(decision.decision_id, {"roi_increase": 18})
+        
+        with patch.object(Session, "commit", side_effect=RuntimeError("database is locked")):
+            with pytest.raises(RuntimeError, match="database is locked"):
+                db_txn.flush_ai_decision_outcomes()
+        
+        assert db_txn._pending_outcomes == [(decision.decision_id, {"roi_increase": 18})]
+        with db_txn.get_session() as session:
+            unchanged = session.query(AIDecisionHistory).filter_by(decision_id=decision.decision_id).one()
+            assert unchanged.actual_impact is None
+        
+        # The retained outcome is written by the next flush
+        assert db_txn.flush_ai_decision_outcomes() == 1
+        assert db_txn._pending_outcomes == []
\ No newline at end of file
@@ -1,32 +1,93 @@
 """Unit tests for API integrations with mocked external calls"""
 
 import pytest
-from datetime import datetime, timedelta
-from unittest.mock import patch, Mock, AsyncMock
-import os
+from datetime import datetime
+from unittest.mock import patch, AsyncMock
 
 from src.integrations.google_ads import GoogleAdsClient
 from src.integrations.facebook_ads import FacebookAdsClient
 from src.integrations.google_analytics import GoogleAnalyticsClient
 from src.integrations.unified_client import UnifiedMarketingClient, Platform
 from src.integrations.base import RateLimitError, AuthenticationError
+from tests.fakes import FakeResponse, FROZEN_NOW, FROZEN_WEEK_AGO
+
+
+# Concrete platforms backed by a client, excluding the ALL pseudo-platform
+REAL_PLATFORMS = tuple(p for p in Platform if p is not Platform.ALL)
+
+# Canned responses for the mocked httpx clients
+RATE_LIMIT_RESPONSE = FakeResponse(429, {"error": "Rate limit exceeded"})
+
+CUSTOM_AUDIENCES_RESPONSE = FakeResponse(200, {
+    "data": [{
+        "id": "aud_001",
+        "name": "High Value Customers",
+        "approximate_count": 50000,
+        "operation_status": {"status": "NORMAL"}
+    }]
+})
+
+
+@pytest.fixture(scope="module")
+def google_ads_client():
+    """Create Google Ads client with test credentials once per module
+    
+    Every test calls connect() first, which rebinds the client to that test's mocked transport.
+    """
+    return GoogleAdsClient()
+
+
+@pytest.fixture(scope="module")
+def facebook_ads_client():
+    """Create Facebook Ads client with test credentials once per module"""
+    return FacebookAdsClient()
+
+
+@pytest.fixture(scope="module")
+def ga_client():
+    """Create Google Analytics client with test credentials once per module"""
+    return GoogleAnalyticsClient()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "client_fixture, route_name, campaign_id, metrics, expected_platform",
+    [
+        ("google_ads_client", "google_ads_search_stream", "123456",
+         ["impressions", "clicks", "conversions", "cost"], "google_ads"),
+        ("facebook_ads_client", "facebook_insights", "789012",
+         ["impressions", "clicks", "conversions"], "facebook_ads"),
+        ("ga_client", "ga_run_report", "camp_001",
+         ["sessions", "users", "conversions"], "google_analytics")
+    ],
+    ids=["google_ads", "facebook_ads", "google_analytics"]
+)
+async def test_fetch_campaign_performance(
+    request, ads_respx, client_fixture, route_name, campaign_id, metrics, expected_platform
+):
+    """Test fetching campaign performance data from each platform"""
+    client = request.getfixturevalue(client_fixture)
+    await client.connect()
+    
+    result = await client.fetch_campaign_performance(
+        campaign_ids=[campaign_id],
+        start_date=datetime(2024, 1, 1),
+        end_date=datetime(2024, 1, 31),
+        metrics=metrics
+    )
+    
+    assert result["platform"] == expected_platform
+    assert len(result["data"]) > 0
+    assert result["data"][0]["campaign_id"] == campaign_id
+    assert "metrics" in result["data"][0]
+    
+    # The route pattern pins the platform's endpoint, so a single call is all that needs checking
+    assert ads_respx.routes[route_name].call_count == 1
 
 
 class TestGoogleAdsClient:
     """Test Google Ads API client"""
     
-    @pytest.fixture
-    def google_ads_client(self):
-        """Create Google Ads client with test credentials"""
-        with patch.dict(os.environ, {
-            'GOOGLE_ADS_DEVELOPER_TOKEN': 'test_token',
-            'GOOGLE_ADS_CLIENT_ID': 'test_client_id',
-            'GOOGLE_ADS_CLIENT_SECRET': 'test_secret',
-            'GOOGLE_ADS_REFRESH_TOKEN': 'test_refresh',
-            'GOOGLE_ADS_CUSTOMER_ID': '1234567890'
-        }):
-            return GoogleAdsClient()
-    
     @pytest.mark.asyncio
     async def test_authentication_oauth(self, google_ads_client, mock_google_ads_client):
         """Test OAuth authentication"""
@@ -48,42 +109,11 @@ class TestGoogleAdsClient:
         )
     
     @pytest.mark.asyncio
-    async def test_fetch_campaign_performance(self, google_ads_client, mock_google_ads_client):
-        """Test fetching campaign performance data"""
-        await google_ads_client.connect()
-        
-        result = await google_ads_client.fetch_campaign_performance(
-            campaign_ids=["123456"],
-            start_date=datetime(2024, 1, 1),
-            end_date=datetime(2024, 1, 31),
-            metrics=["impressions", "clicks", "conversions", "cost"]
-        )
-        
-        assert result["platform"] == "google_ads"
-        assert len(result["data"]) > 0
-        assert result["data"][0]["campaign_id"] == "123456"
-        assert "metrics" in result["data"][0]
-        
-        # Verify API was called with correct query
-        mock_google_ads_client.request.assert_called()
-        call_args = mock_google_ads_client.request.call_args
-        assert "searchStream" in call_args[0][1]
-    
-    @pytest.mark.asyncio
-    async def test_update_campaign_budget(self, google_ads_client, mock_google_ads_client):
+    async def test_update_campaign_budget(self, google_ads_client, ads_respx):
         """Test updating campaign budget"""
+        # Budget query and mutate responses come from the shared respx router
         await google_ads_client.connect()
         
-        # Mock campaign budget query response
-        mock_google_ads_client.request.side_effect = [
-            Mock(status_code=200, json=lambda: {
-                "results": [{
-                    "campaignBudget": {"id": "999"}
-                }]
-            }),
-            Mock(status_code=200, json=lambda: {"results": []})
-        ]
-        
         result = await google_ads_client.update_campaign_budget(
             campaign_id="123456",
             new_budget=5000.0,
@@ -112,16 +142,13 @@ class TestGoogleAdsClient:
         await google_ads_client.connect()
         
         # Mock rate limit response
-        mock_google_ads_client.request.return_value = Mock(
-            status_code=429,
-            json=lambda: {"error": "Rate limit exceeded"}
-        )
+        mock_google_ads_client.request.return_value = RATE_LIMIT_RESPONSE
         
         with pytest.raises(RateLimitError):
             await google_ads_client.fetch_campaign_performance(
                 campaign_ids=["123456"],
-                start_date=datetime.now(),
-                end_date=datetime.now(),
+                start_date=FROZEN_NOW,
+                end_date=FROZEN_NOW,
                 metrics=["clicks"]
             )
 
@@ -129,53 +156,12 @@ class TestGoogleAdsClient:
 class TestFacebookAdsClient:
     """Test Facebook Ads API client"""
     
-    @pytest.fixture
-    def facebook_ads_client(self):
-        """Create Facebook Ads client with test credentials"""
-        with patch.dict(os.environ, {
-            'FACEBOOK_APP_ID': 'test_app_id',
-            'FACEBOOK_APP_SECRET': 'test_secret',
-            'FACEBOOK_ACCESS_TOKEN': 'test_token',
-            'FACEBOOK_AD_ACCOUNT_ID': '1234567890'
-        }):
-            return FacebookAdsClient()
-    
     @pytest.mark.asyncio
-    async def test_fetch_campaign_performance(self, facebook_ads_client, mock_facebook_ads_client):
-        """Test fetching campaign performance from Facebook"""
-        await facebook_ads_client.connect()
-        
-        result = await facebook_ads_client.fetch_campaign_performance(
-            campaign_ids=["789012"],
-            start_date=datetime(2024, 1, 1),
-            end_date=datetime(2024, 1, 31),
-            metrics=["impressions", "clicks", "conversions"]
-        )
-        
-        assert result["platform"] == "facebook_ads"
-        assert len(result["data"]) > 0
-        assert result["data"][0]["campaign_id"] == "789012"
-        
-        # Verify correct API endpoint was called
-        mock_facebook_ads_client.request.assert_called()
-        call_args = mock_facebook_ads_client.request.call_args
-        assert "/insights" in call_args[0][1]
-    
-    @pytest.mark.asyncio
-    async def test_update_campaign_budget(self, facebook_ads_client, mock_facebook_ads_client):
+    async def test_update_campaign_budget(self, facebook_ads_client, ads_respx):
         """Test updating Facebook campaign budget"""
+        # Campaign and adset responses come from the shared respx router
         await facebook_ads_client.connect()
         
-        # Mock campaign and adset responses
-        mock_facebook_ads_client.request.side_effect = [
-            Mock(status_code=200, json=lambda: {
-                "adsets": {
-                    "data": [{"id": "adset_001"}]
-                }
-            }),
-            Mock(status_code=200, json=lambda: {"success": True})
-        ]
-        
         result = await facebook_ads_client.update_campaign_budget(
             campaign_id="789012",
             new_budget=1000.0,
@@ -193,17 +179,7 @@ class TestFacebookAdsClient:
         await facebook_ads_client.connect()
         
         # Mock custom audiences response
-        mock_facebook_ads_client.request.return_value = Mock(
-            status_code=200,
-            json=lambda: {
-                "data": [{
-                    "id": "aud_001",
-                    "name": "High Value Customers",
-                    "approximate_count": 50000,
-                    "operation_status": {"status": "NORMAL"}
-                }]
-            }
-        )
+        mock_facebook_ads_client.request.return_value = CUSTOM_AUDIENCES_RESPONSE
         
         result = await facebook_ads_client.get_audience_insights()
         
@@ -215,53 +191,6 @@ class TestFacebookAdsClient:
 class TestGoogleAnalyticsClient:
     """Test Google Analytics API client"""
     
-    @pytest.fixture
-    def ga_client(self):
-        """Create Google Analytics client with test credentials"""
-        with patch.dict(os.environ, {
-            'GOOGLE_ANALYTICS_PROPERTY_ID': '123456789',
-            'GOOGLE_ANALYTICS_CLIENT_ID': 'test_client_id',
-            'GOOGLE_ANALYTICS_CLIENT_SECRET': 'test_secret',
-            'GOOGLE_ANALYTICS_REFRESH_TOKEN': 'test_refresh'
-        }):
-            return GoogleAnalyticsClient()
-    
-    @pytest.mark.asyncio
-    async def test_fetch_campaign_performance(self, ga_client, mock_google_ads_client):
-        """Test fetching campaign data from GA4"""
-        # Reuse Google Ads mock for OAuth
-        await ga_client.connect()
-        
-        # Mock GA4 API response
-        mock_google_ads_client.request.return_value = Mock(
-            status_code=200,
-            json=lambda: {
-                "rows": [{
-                    "dimensionValues": [
-                        {"value": "camp_001"},
-                        {"value": "Summer Campaign"},
-                        {"value": "2024-01-15"}
-                    ],
-                    "metricValues": [
-                        {"value": "1000"},  # sessions
-                        {"value": "500"},   # users
-                        {"value": "50"}     # conversions
-                    ]
-                }]
-            }
-        )
-        
-        result = await ga_client.fetch_campaign_performance(
-            campaign_ids=["camp_001"],
-            start_date=datetime(2024, 1, 1),
-            end_date=datetime(2024, 1, 31),
-            metrics=["sessions", "users", "conversions"]
-        )
-        
-        assert result["platform"] == "google_analytics"
-        assert len(result["data"]) > 0
-        assert result["data"][0]["campaign_id"] == "camp_001"
-    
     @pytest.mark.asyncio
     async def test_read_only_operations(self, ga_client):
         """Test that GA client returns appropriate responses for write operations"""
@@ -277,14 +206,42 @@ class TestGoogleAnalyticsClient:
         assert result["status"] == "not_supported"
 
 
+@pytest.mark.xdist_group("unified")
 class TestUnifiedMarketingClient:
-    """Test unified marketing client"""
+    """Test unified marketing client
+    
+    The tests share one stateful client, so they are pinned to a single xdist worker.
+    """
+    
+    @pytest.fixture(scope="module")
+    def unified_client(self):
+        """Create unified client once per module"""
+        return UnifiedMarketingClient()
+    
+    @pytest.fixture(autouse=True)
+    def reset_unified_client(self, unified_client):
+        """Drop connections and mocked fetches left on the shared client by the previous test"""
+        unified_client._connected_clients.clear()
+        for client in unified_client.clients.values():
+            client.__dict__.pop('fetch_campaign_performance', None)
     
     @pytest.fixture
-    async def unified_client(self):
-        """Create unified client"""
-        client = UnifiedMarketingClient()
-        return client
+    def wire_platforms(self, unified_client):
+        """Mock fetch_campaign_performance on the given platforms and mark them connected
+        
+        Each platform maps to the result its fetch returns, or an exception it raises.
+        """
+        def _wire(platform_results):
+            for platform, result in platform_results.items():
+                if isinstance(result, Exception):
+                    fetch = AsyncMock(side_effect=result)
+                else:
+                    fetch = AsyncMock(return_value=result)
+                unified_client.clients[platform].fetch_campaign_performance = fetch
+                unified_client._connected_clients.add(platform)
+            return unified_client
+        
+        return _wire
     
     @pytest.mark.asyncio
     async def test_connect_all_platforms(self, unified_client):
@@ -296,15 +253,17 @@ class TestUnifiedMarketingClient:
             await unified_client.connect_all()
             
             # Verify all platforms attempted connection
-            for platform in Platform:
-                if platform != Platform.ALL:
-                    unified_client.clients[platform].connect.assert_called_once()
+            for platform in REAL_PLATFORMS:
+                unified_client.clients[platform].connect.assert_called_once()
+            
+            # Connections run concurrently, so only the resulting set is checked
+            assert unified_client._connected_clients == set(unified_client.clients)
     
     @pytest.mark.asyncio
-    async def test_fetch_campaign_performance_multi_platform(self, unified_client):
+    async def test_fetch_campaign_performance_multi_platform(self, wire_platforms):
         """Test fetching data from multiple platforms"""
         # Mock individual client methods
-        mock_results = {
+        unified_client = wire_platforms({
             Platform.GOOGLE_ADS: {
                 "platform": "google_ads",
                 "data": [{"campaign_id": "g_001", "metrics": {"clicks": 100}}]
@@ -313,16 +272,12 @@ class TestUnifiedMarketingClient:
                 "platform": "facebook_ads",
                 "data": [{"campaign_id": "f_001", "metrics": {"clicks": 200}}]
             }
-        }
-        
-        for platform, result in mock_results.items():
-            unified_client.clients[platform].fetch_campaign_performance = AsyncMock(return_value=result)
-            unified_client._connected_clients.add(platform)
+        })
         
         result = await unified_client.fetch_campaign_performance(
             campaign_ids=["g_001", "f_001"],
-            start_date=datetime.now() - timedelta(days=7),
-            end_date=datetime.now(),
+            start_date=FROZEN_WEEK_AGO,
+            end_date=FROZEN_NOW,
             metrics=["clicks"],
             platforms=[Platform.GOOGLE_ADS, Platform.FACEBOOK_ADS]
         )
@@ -333,28 +288,34 @@ class TestUnifiedMarketingClient:
         assert result["summary"]["combined_metrics"]["clicks"] == 300
     
     @pytest.mark.asyncio
-    async def test_error_handling_partial_failure(self, unified_client):
+    async def test_error_handling_partial_failure(self, wire_platforms):
         """Test handling when one platform fails"""
-        # Mock Google Ads to succeed
-        unified_client.clients[Platform.GOOGLE_ADS].fetch_campaign_performance = AsyncMock(
-            return_value={"platform": "google_ads", "data": []}
-        )
-        unified_client._connected_clients.add(Platform.GOOGLE_ADS)
-        
-        # Mock Facebook to fail
-        unified_client.clients[Platform.FACEBOOK_ADS].fetch_campaign_performance = AsyncMock(
-            side_effect=Exception("Facebook API Error")
-        )
-        unified_client._connected_clients.add(Platform.FACEBOOK_ADS)
+        # Google Ads succeeds, Facebook fails
+        unified_client = wire_platforms({
+            Platform.GOOGLE_ADS: {"platform": "google_ads", "data": []},
+            Platform.FACEBOOK_ADS: Exception("Facebook API Error")
+        })
         
         result = await unified_client.fetch_campaign_performance(
             campaign_ids=["123"],
-            start_date=datetime.now(),
-            end_date=datetime.now(),
+            start_date=FROZEN_NOW,
+            end_date=FROZEN_NOW,
             metrics=["clicks"],
             platforms=[Platform.GOOGLE_ADS, Platform.FACEBOOK_ADS]
         )
         
         assert "google_ads" in result["results"]
         assert "facebook_ads" in result["errors"]
-        assert "Facebook API Error" in result["errors"]["facebook_ads"]
\ No newline at end of file
+        assert "Facebook API Error" in result["errors"]["facebook_ads"]    
+    @pytest.mark.asyncio
+    async def test_validate_credentials_partial_failure(self, unified_client):
+        """Test one platform's validation error only marks that platform invalid"""
+        unified_client._connected_clients.update({Platform.GOOGLE_ADS, Platform.FACEBOOK_ADS})
+        with patch.object(unified_client.clients[Platform.GOOGLE_ADS], 'validate_credentials',
+                          new_callable=AsyncMock, return_value=True),\
+             patch.object(unified_client.clients[Platform.FACEBOOK_ADS], 'validate_credentials',
+                          new_callable=AsyncMock, side_effect=Exception("Facebook API Error")):
+            
+            result = await unified_client.validate_credentials()
+        
+        assert result == {"google_ads": True, "facebook_ads": False, "google_analytics": False}
@@ -0,0 +1,96 @@
+"""Unit tests for database manager caching"""
+
+import pytest
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from src.database import PerformanceMetrics, ROITracking
+
+
+PERIOD_START = datetime.utcnow() - timedelta(days=1)
+PERIOD_END = datetime.utcnow() + timedelta(days=1)
+
+AUTOMATED_METRICS = {
+    "impressions": 10000,
+    "clicks": 300,
+    "conversions": 30,
+    "revenue": Decimal("3000"),
+    "cost": Decimal("500"),
+    "baseline_ctr": 2.0,
+    "baseline_conversion_rate": 5.0
+}
+
+
+@pytest.fixture
+def campaign_id(db_txn):
+    """Id of a campaign created inside the test transaction"""
+    campaign = db_txn.create_campaign({
+        "campaign_id": "roi_cache_test",
+        "name": "ROI Cache Test",
+        "platform": "google_ads",
+        "start_date": datetime.utcnow() - timedelta(days=30)
+    })
+    return campaign.id
+
+
+class TestPeriodROICache:
+    """Test caching of period ROI aggregates"""
+    
+    def test_cached_aggregates_still_record_a_row_per_call(self, db_txn, campaign_id):
+        """Test repeated calls reuse the aggregates but insert a fresh ROI row each time"""
+        first = db_txn.calculate_period_roi(PERIOD_START, PERIOD_END, campaign_id)
+        second = db_txn.calculate_period_roi(PERIOD_START, PERIOD_END, campaign_id)
+        
+        assert first.roi_id != second.roi_id
+        assert len(db_txn._roi_cache) == 1
+        with db_txn.get_session() as session:
+            assert session.query(ROITracking).filter_by(campaign_id=campaign_id).count() == 2
+    
+    def test_raw_session_commit_invalidates_cache(self, db_txn, campaign_id):
+        """Test a commit from a session outside get_session clears cached aggregates"""
+        assert db_txn.calculate_period_roi(PERIOD_START, PERIOD_END, campaign_id).avg_ctr_improvement == 0
+        
+        session = db_txn.SessionLocal()
+        try:
+            metrics = PerformanceMetrics(
+                metric_id="metric_raw_session",
+                campaign_id=campaign_id,
+                metric_date=datetime.utcnow(),
+                is_automated=True,
+                **AUTOMATED_METRICS
+            )
+            metrics.calculate_metrics()
+            session.add(metrics)
+            session.commit()
+        finally:
+            session.close()
+        
+        assert db_txn._roi_cache == {}
+        assert db_txn.calculate_period_roi(PERIOD_START, PERIOD_END, campaign_id).avg_ctr_improvement > 0
+    
+    def test_bulk_insert_invalidates_cache(self, db_txn, campaign_id):
+        """Test a Core executemany insert of metrics clears cached aggregates on commit"""
+        db_txn.calculate_period_roi(PERIOD_START, PERIOD_END, campaign_id)
+        
+        db_txn.record_performance_metrics_bulk(campaign_id, [AUTOMATED_METRICS], is_automated=True)
+        
+        assert db_txn._roi_cache == {}
+        assert db_txn.calculate_period_roi(PERIOD_START, PERIOD_END, campaign_id).avg_ctr_improvement > 0
+    
+    def test_rolled_back_write_keeps_cache(self, db_txn, campaign_id):
+        """Test writes that are rolled back leave cached aggregates in place"""
+        db_txn.calculate_period_roi(PERIOD_START, PERIOD_END, campaign_id)
+        
+        with pytest.raises(RuntimeError):
+            with db_txn.get_session() as session:
+                session.add(PerformanceMetrics(
+                    metric_id="metric_rolled_back",
+                    campaign_id=campaign_id,
+                    metric_date=datetime.utcnow(),
+                    is_automated=True,
+                    **AUTOMATED_METRICS
+                ))
+                session.flush()
+                raise RuntimeError("abort write")
+        
+        assert len(db_txn._roi_cache) == 1
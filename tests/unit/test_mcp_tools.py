@@ -1,12 +1,10 @@
 """Unit tests for MCP marketing automation tools"""
 
 import pytest
-import json
-from datetime import datetime, timedelta
-from unittest.mock import patch, Mock, AsyncMock
 
 from src.tools.marketing_tools import (
     generate_campaign_report,
+    stream_campaign_report,
     optimize_campaign_budget,
     create_campaign_copy,
     analyze_audience_segments
@@ -22,27 +20,72 @@ from src.models import (
 )
 
 
+@pytest.fixture(scope="session")
+def cached_report():
+    """Memoize generate_campaign_report results across the session
+    
+    Reports only depend on the campaigns, date range, format and chart flag, so inputs
+    differing in other fields share one result.
+    """
+    reports = {}
+    
+    async def get_report(input_data):
+        key = (
+            tuple(input_data.campaign_ids),
+            input_data.date_range["start"],
+            input_data.date_range["end"],
+            input_data.format,
+            input_data.include_charts
+        )
+        if key not in reports:
+            reports[key] = await generate_campaign_report(input_data)
+        return reports[key]
+    
+    return get_report
+
+
+@pytest.fixture(scope="module")
+def base_report_input():
+    """JSON report input for two campaigns, validated once per module (input models are frozen)"""
+    return GenerateCampaignReportInput(
+        campaign_ids=["camp_001", "camp_002"],
+        date_range={
+            "start": "2024-01-01",
+            "end": "2024-01-31"
+        },
+        metrics=["conversions", "roi", "ctr"],
+        format=ReportFormat.JSON
+    )
+
+
+@pytest.fixture(scope="module")
+def base_budget_input():
+    """ROI budget optimization input for two campaigns, validated once per module"""
+    return OptimizeCampaignBudgetInput(
+        campaign_ids=["camp_001", "camp_002"],
+        total_budget=10000,
+        optimization_goal="maximize_roi",
+        historical_days=30,
+        include_projections=True
+    )
+
+
 class TestGenerateCampaignReport:
     """Test campaign report generation tool"""
     
     @pytest.mark.asyncio
-    async def test_generate_campaign_report_success(self):
+    async def test_generate_campaign_report_success(self, cached_report, base_report_input):
         """Test successful campaign report generation"""
         # Prepare input
-        input_data = GenerateCampaignReportInput(
-            campaign_ids=["camp_001", "camp_002"],
-            date_range={
-                "start": "2024-01-01",
-                "end": "2024-01-31"
-            },
-            metrics=["impressions", "clicks", "conversions", "ctr"],
-            format=ReportFormat.JSON,
-            include_charts=True,
-            group_by="campaign"
-        )
+        input_data = GenerateCampaignReportInput.model_validate({
+            **base_report_input.model_dump(),
+            "metrics": ["impressions", "clicks", "conversions", "ctr"],
+            "include_charts": True,
+            "group_by": "campaign"
+        })
         
         # Execute
-        result = await generate_campaign_report(input_data)
+        result = await cached_report(input_data)
         
         # Verify
         assert result.report_id
@@ -59,15 +102,15 @@ class TestGenerateCampaignReport:
             assert campaign.ctr > 0
     
     @pytest.mark.asyncio
-    async def test_generate_campaign_report_pdf_format(self):
+    async def test_generate_campaign_report_pdf_format(self, base_report_input):
         """Test report generation with PDF format"""
-        input_data = GenerateCampaignReportInput(
-            campaign_ids=["camp_001"],
-            date_range={"start": "2024-01-01", "end": "2024-01-31"},
-            metrics=["impressions", "clicks"],
-            format=ReportFormat.PDF,
-            include_charts=False
-        )
+        input_data = GenerateCampaignReportInput.model_validate({
+            **base_report_input.model_dump(),
+            "campaign_ids": ["camp_001"],
+            "metrics": ["impressions", "clicks"],
+            "format": ReportFormat.PDF,
+            "include_charts": False
+        })
         
         result = await generate_campaign_report(input_data)
         
@@ -75,6 +118,24 @@ class TestGenerateCampaignReport:
         assert result.download_url is not None
         assert result.charts is None
     
+    @pytest.mark.asyncio
+    async def test_stream_campaign_report_rows(self):
+        """Test report streaming yields header, campaign and summary rows"""
+        input_data = GenerateCampaignReportInput(
+            campaign_ids=["camp_001", "camp_002"],
+            date_range={"start": "2024-01-01", "end": "2024-01-31"},
+            metrics=["clicks", "conversions"],
+            include_charts=False
+        )
+        
+        rows = [row async for row in stream_campaign_report(input_data)]
+        
+        assert rows[0]["record"] == "report"
+        assert rows[0]["report_id"]
+        assert [r["campaign_id"] for r in rows if r["record"] == "campaign"] == ["camp_001", "camp_002"]
+        assert rows[-1]["record"] == "summary"
+        assert rows[-1]["total_sent"] > 0
+    
     @pytest.mark.asyncio
     async def test_generate_campaign_report_validation_error(self):
         """Test report generation with invalid date range"""
@@ -90,25 +151,9 @@ class TestOptimizeCampaignBudget:
     """Test campaign budget optimization tool"""
     
     @pytest.mark.asyncio
-    async def test_optimize_budget_maximize_roi(self):
+    async def test_optimize_budget_maximize_roi(self, base_budget_input):
         """Test budget optimization for maximizing ROI"""
-        # Mock campaign performance data
-        campaigns = [
-            Mock(campaign_id="camp_001", campaign_name="High ROI Campaign", 
-                 ctr=3.5, conversion_rate=6.0, roi=500),
-            Mock(campaign_id="camp_002", campaign_name="Low ROI Campaign",
-                 ctr=1.5, conversion_rate=2.0, roi=150)
-        ]
-        
-        input_data = OptimizeCampaignBudgetInput(
-            campaign_ids=["camp_001", "camp_002"],
-            total_budget=10000,
-            optimization_goal="maximize_roi",
-            historical_days=30,
-            include_projections=True
-        )
-        
-        result = await optimize_campaign_budget(input_data)
+        result = await optimize_campaign_budget(base_budget_input)
         
         # Verify
         assert result.optimization_id
@@ -123,17 +168,15 @@ class TestOptimizeCampaignBudget:
         assert high_roi_alloc.recommended_budget > low_roi_alloc.recommended_budget
     
     @pytest.mark.asyncio
-    async def test_optimize_budget_with_constraints(self):
+    async def test_optimize_budget_with_constraints(self, base_budget_input):
         """Test budget optimization with constraints"""
-        input_data = OptimizeCampaignBudgetInput(
-            campaign_ids=["camp_001", "camp_002"],
-            total_budget=10000,
-            optimization_goal="maximize_conversions",
-            constraints={
+        input_data = base_budget_input.model_copy(update={
+            "optimization_goal": "maximize_conversions",
+            "constraints": {
                 "camp_001": {"min": 2000, "max": 6000},
                 "camp_002": {"min": 1000, "max": 4000}
             }
-        )
+        })
         
         result = await optimize_campaign_budget(input_data)
         
@@ -211,7 +254,7 @@ class TestAnalyzeAudienceSegments:
     async def test_analyze_segments_demographics(self):
         """Test audience segmentation by demographics"""
         input_data = AnalyzeAudienceSegmentsInput(
-            contact_list_id=��list_001",
+            contact_list_id="list_001",
             criteria=[SegmentCriteria.DEMOGRAPHICS, SegmentCriteria.BEHAVIOR],
             min_segment_size=100,
             max_segments=5,
@@ -263,17 +306,10 @@ class TestToolIntegration:
     """Test integration between different tools"""
     
     @pytest.mark.asyncio
-    async def test_report_to_optimization_flow(self):
+    async def test_report_to_optimization_flow(self, cached_report, base_report_input):
         """Test flow from report generation to budget optimization"""
         # Generate report
-        report_input = GenerateCampaignReportInput(
-            campaign_ids=["camp_001", "camp_002"],
-            date_range={"start": "2024-01-01", "end": "2024-01-31"},
-            metrics=["conversions", "roi", "ctr"],
-            format=ReportFormat.JSON
-        )
-        
-        report_result = await generate_campaign_report(report_input)
+        report_result = await cached_report(base_report_input)
         
         # Use report data for optimization
         campaign_ids = [c.campaign_id for c in report_result.campaigns]